@@ -1,7 +1,16 @@
+import importlib
+import time
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 
 class SimEnvironment(ABC):
+    # methods timed by enable_profiling, in addition to step and reset
+    profiled_phases = ()
+    # per env state arrays (one row per env) exported by get_state
+    state_fields = ()
+
     @abstractmethod
     def step(self, action) -> dict:
         pass
@@ -9,3 +18,166 @@ class SimEnvironment(ABC):
     @abstractmethod
     def reset(self) -> dict:
         pass
+
+    def _state_arrays(self) -> dict:
+        return {name: getattr(self, name) for name in self.state_fields}
+
+    def rollout(self, policy_fn, T, out=None, **step_kwargs) -> dict:
+        """Run T steps of `action = policy_fn(obs)` and write them into (T, num_envs, ...) buffers.
+
+        `out` maps observation keys and `action` (`action_<key>` for dict
+        actions) to caller owned arrays with at least T rows, missing buffers
+        are allocated. Row t holds the action of step t and the observation it
+        produced. The policy sees the array observations of `_observe`.
+        """
+        out = {} if out is None else out
+        # list mode envs step with array outputs, their list observations would
+        # be built and dropped every step
+        list_mode = self.__dict__.get("array_obs") is False
+        if list_mode:
+            self.array_obs = True
+        try:
+            obs = self._observe()
+            for t in range(T):
+                action = policy_fn(obs)
+                self.step(action, **step_kwargs)
+                obs = self._observe()
+                for key, value in _action_arrays(action, self.num_envs).items():
+                    _write_row(
+                        out, "action" if key is None else f"action_{key}", t, T, value
+                    )
+                for key, value in obs.items():
+                    _write_row(out, key, t, T, value)
+        finally:
+            if list_mode:
+                self.array_obs = False
+        return out
+
+    def get_state(self, indices=None) -> np.ndarray:
+        """Copy the state of the envs at `indices` (all by default) into a structured array.
+
+        Rows can be gathered and repeated freely, e.g. `np.repeat(state, k)`
+        fans every root out to k children for `set_state`.
+        """
+        arrays = self._state_arrays()
+        if not arrays:
+            raise NotImplementedError(f"{type(self).__name__} has no state_fields")
+        if indices is None:
+            indices = slice(None)
+        columns = {name: array[indices] for name, array in arrays.items()}
+        dtype = [(name, c.dtype, c.shape[1:]) for name, c in columns.items()]
+        state = np.empty(len(next(iter(columns.values()))), dtype=dtype)
+        for name, column in columns.items():
+            state[name] = column
+        return state
+
+    def set_state(self, state, indices=None):
+        """Write the rows of a `get_state` array into the envs at `indices`."""
+        if indices is None:
+            indices = slice(None)
+        for name, array in self._state_arrays().items():
+            array[indices] = state[name]
+
+    def enable_profiling(self):
+        """Record call counts and wall time of step, reset and `profiled_phases`.
+
+        The methods are wrapped on this instance only, so an env that never
+        enables profiling runs the unwrapped methods at no extra cost.
+        """
+        if self.__dict__.get("_profiling"):
+            return
+        self._profiling = True
+        stats = self.__dict__.setdefault("_profile", {})
+        for name in ("step", "reset", *self.profiled_phases):
+            setattr(
+                self,
+                name,
+                _timed(getattr(self, name), stats.setdefault(name, [0, 0.0])),
+            )
+
+    def disable_profiling(self):
+        """Remove the timing wrappers, the recorded stats are kept."""
+        if not self.__dict__.get("_profiling"):
+            return
+        self._profiling = False
+        for name in self._profile:
+            self.__dict__.pop(name, None)
+
+    def reset_profile(self):
+        for stats in self.__dict__.get("_profile", {}).values():
+            stats[:] = [0, 0.0]
+
+    def profile_summary(self) -> dict:
+        """Per phase calls, total_s, mean_ms and share of the step time.
+
+        Times are inclusive, the phases run inside step.
+        """
+        profile = self.__dict__.get("_profile", {})
+        step_total = profile.get("step", [0, 0.0])[1]
+        summary = {}
+        for name, (calls, total) in profile.items():
+            summary[name] = {
+                "calls": calls,
+                "total_s": total,
+                "mean_ms": total / calls * 1e3 if calls else 0.0,
+                "step_fraction": total / step_total if step_total else 0.0,
+            }
+        return summary
+
+    def profile_table(self) -> str:
+        lines = [
+            f"{'phase':24s} {'calls':>8s} {'total s':>10s} {'mean ms':>10s} {'% step':>7s}"
+        ]
+        for name, row in self.profile_summary().items():
+            lines.append(
+                f"{name:24s} {row['calls']:8d} {row['total_s']:10.4f} "
+                f"{row['mean_ms']:10.4f} {row['step_fraction'] * 100:6.1f}%"
+            )
+        return "\n".join(lines)
+
+
+def _action_arrays(action, num_envs):
+    # (num_envs,) arrays per action key in the caller's dtype, key None for plain
+    # array actions
+    if isinstance(action, dict):
+        items = action.items()
+    else:
+        items = [(None, action)]
+    arrays = {}
+    for key, value in items:
+        arrays[key] = np.broadcast_to(np.asarray(value), (num_envs,))
+    return arrays
+
+
+def _write_row(buffers, key, t, T, value):
+    buffer = buffers.get(key)
+    if buffer is None:
+        value = np.asarray(value)
+        buffer = buffers[key] = np.empty((T, *value.shape), dtype=value.dtype)
+    buffer[t] = value
+
+
+def _timed(method, stats):
+    # stats is a mutable [calls, total seconds] pair
+    perf_counter = time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        result = method(*args, **kwargs)
+        stats[0] += 1
+        stats[1] += perf_counter() - start
+        return result
+
+    return timed
+
+
+def _lazy_getattr(module_name, names):
+    """Module __getattr__ that imports `names` (name -> relative module) on first access."""
+
+    def __getattr__(name):
+        if name in names:
+            module = importlib.import_module(names[name], module_name)
+            return getattr(module, name)
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+
+    return __getattr__
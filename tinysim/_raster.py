@@ -0,0 +1,181 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+def rgb(color) -> np.ndarray:
+    """uint8 (3,) color from a "#RRGGBB" string or an (r, g, b) tuple.
+
+    Arrays of shape (N, 3) pass through and give every env its own color.
+    """
+    if isinstance(color, str):
+        color = [int(color[i : i + 2], 16) for i in (1, 3, 5)]
+    return np.asarray(color, dtype=np.uint8)
+
+
+def _batch(img, *arrays):
+    # broadcast the shape parameters to (N, M)
+    n = img.shape[0]
+    arrays = [np.asarray(a, dtype=np.float32) for a in arrays]
+    arrays = [a.reshape(n, -1) if a.ndim > 1 else a.reshape(-1, 1) for a in arrays]
+    return np.broadcast_arrays(*arrays)
+
+
+def fill_rects(img, x0, y0, x1, y1, color):
+    """Fill the axis aligned pixel rectangles [x0, x1) x [y0, y1) of every env.
+
+    `img` is (N, H, W, 3), the corners broadcast to (N, M). A pixel is filled
+    when its center is inside a rectangle. The corners are scattered as +-1
+    into one (N, H + 1, W + 1) table whose prefix sums count the rectangles
+    covering each pixel, so the cost is O(N * (M + H * W)) for any M.
+    """
+    n, h, w, _ = img.shape
+    x0, y0, x1, y1 = _batch(img, x0, y0, x1, y1)
+    c0 = np.clip(np.ceil(x0 - 0.5), 0, w).astype(np.intp)
+    c1 = np.clip(np.ceil(x1 - 0.5), 0, w).astype(np.intp)
+    r0 = np.clip(np.ceil(y0 - 0.5), 0, h).astype(np.intp)
+    r1 = np.clip(np.ceil(y1 - 0.5), 0, h).astype(np.intp)
+    valid = (c0 < c1) & (r0 < r1)
+    if not valid.any():
+        return img
+
+    env = np.broadcast_to(np.arange(n)[:, None], valid.shape)[valid]
+    c0, c1, r0, r1 = c0[valid], c1[valid], r0[valid], r1[valid]
+    base = env * ((h + 1) * (w + 1))
+    corners = np.concatenate(
+        [
+            base + r0 * (w + 1) + c0,
+            base + r0 * (w + 1) + c1,
+            base + r1 * (w + 1) + c0,
+            base + r1 * (w + 1) + c1,
+        ]
+    )
+    signs = np.repeat(np.array([1.0, -1.0, -1.0, 1.0]), len(env))
+    table = np.bincount(corners, signs, minlength=n * (h + 1) * (w + 1))
+    table = table.reshape(n, h + 1, w + 1)
+    covered = table.cumsum(axis=1).cumsum(axis=2)[:, :h, :w] > 0.5
+    return _fill_mask(img, covered, color)
+
+
+def fill_masked_bands(img, rows, cols, color):
+    """Fill the pixels (y, x) of env n for which rows[n, m, y] & cols[n, m, x] for some m.
+
+    `rows` is (N, M, H) and `cols` (N, M, W) bool, so shape m is the product of
+    a set of rows and a set of columns, e.g. a column band with a gap. The
+    coverage is one batched (H, M) @ (M, W) product, O(N * M * H * W) but
+    without the full frame prefix sums of `fill_rects`.
+    """
+    rows = np.asarray(rows, dtype=np.float32).transpose(0, 2, 1)
+    cols = np.asarray(cols, dtype=np.float32)
+    return _fill_mask(img, np.matmul(rows, cols) > 0.5, color)
+
+
+def _fill_mask(img, covered, color):
+    # write color into the (N, H, W) covered pixels, the rgb triplets are copied
+    # as single 3 byte items, much faster than a boolean scatter of (K, 3) rows
+    color = rgb(color)
+    pixels = img.view(np.dtype((np.void, 3)))[..., 0]
+    color = color.view(np.dtype((np.void, 3)))[..., 0]
+    if color.ndim == 1:
+        color = color[:, None, None]
+    np.copyto(pixels, color, where=covered)
+    return img
+
+
+def _fill_patches(img, cx, cy, reach, inside, color):
+    # fill the pixels around each (N, M) center for which inside(dx, dy, m) holds,
+    # only a (2 * reach + 1) square patch around the center is tested
+    n, h, w, _ = img.shape
+    color = rgb(color)
+    offsets = np.arange(-reach, reach + 1)
+    # shapes at non finite positions are hidden, moved off screen
+    hidden = ~(np.isfinite(cx) & np.isfinite(cy))
+    if hidden.any():
+        cx = np.where(hidden, -2.0 * reach - 2.0, cx)
+        cy = np.where(hidden, -2.0 * reach - 2.0, cy)
+    for m in range(cx.shape[1]):
+        px = np.floor(cx[:, m]).astype(np.intp)[:, None] + offsets  # (N, P)
+        py = np.floor(cy[:, m]).astype(np.intp)[:, None] + offsets
+        dx = (px + 0.5 - cx[:, m, None])[:, None, :]  # (N, 1, P)
+        dy = (py + 0.5 - cy[:, m, None])[:, :, None]  # (N, P, 1)
+        mask = inside(dx, dy, m)
+        mask &= ((px >= 0) & (px < w))[:, None, :]
+        mask &= ((py >= 0) & (py < h))[:, :, None]
+        e, iy, ix = np.nonzero(mask)
+        img[e, py[e, iy], px[e, ix]] = color if color.ndim == 1 else color[e]
+    return img
+
+
+def fill_rotated_rects(img, cx, cy, half_w, half_h, angle, color):
+    """Fill rectangles centered at (cx, cy) and rotated by `angle` radians.
+
+    Pixel coordinates with y down, a positive angle turns clockwise on screen.
+    The parameters broadcast to (N, M).
+    """
+    cx, cy, half_w, half_h, angle = _batch(img, cx, cy, half_w, half_h, angle)
+    if cx.size == 0:
+        return img
+    cos, sin = np.cos(angle), np.sin(angle)
+    reach = int(np.ceil(np.hypot(half_w, half_h).max())) + 1
+
+    def inside(dx, dy, m):
+        c = cos[:, m, None, None]
+        s = sin[:, m, None, None]
+        lx = np.abs(dx * c + dy * s)
+        ly = np.abs(dy * c - dx * s)
+        return (lx <= half_w[:, m, None, None]) & (ly <= half_h[:, m, None, None])
+
+    return _fill_patches(img, cx, cy, reach, inside, color)
+
+
+def fill_ellipses(img, cx, cy, rx, ry, color):
+    """Fill axis aligned ellipses centered at (cx, cy), parameters broadcast to (N, M)."""
+    cx, cy, rx, ry = _batch(img, cx, cy, rx, ry)
+    if cx.size == 0:
+        return img
+    reach = int(np.ceil(max(rx.max(), ry.max()))) + 1
+
+    def inside(dx, dy, m):
+        ex = dx / rx[:, m, None, None]
+        ey = dy / ry[:, m, None, None]
+        return ex * ex + ey * ey <= 1.0
+
+    return _fill_patches(img, cx, cy, reach, inside, color)
+
+
+class Rasterizer(ABC):
+    """Draws a batch of envs into (num_envs, height, width, 3) uint8 arrays without a display.
+
+    Subclasses draw the static parts of the scene once into `background`,
+    (height, width, 3) or one (height, width, 3) image per `_background_index`,
+    and the moving parts per frame in `_draw`.
+    """
+
+    def __init__(self, sim_env, size=(84, 84)):
+        self.sim_env = sim_env
+        self.width, self.height = size
+        self.background = self._background()
+
+    @abstractmethod
+    def _background(self) -> np.ndarray:
+        pass
+
+    def _background_index(self):
+        return None
+
+    @abstractmethod
+    def _draw(self, img):
+        pass
+
+    def render(self, out=None) -> np.ndarray:
+        """Draw the current state of all envs into `out`, allocated when None."""
+        shape = (self.sim_env.num_envs, self.height, self.width, 3)
+        if out is None:
+            out = np.empty(shape, dtype=np.uint8)
+        index = self._background_index()
+        if index is None:
+            out[:] = self.background
+        else:
+            np.take(self.background, index, axis=0, out=out)
+        self._draw(out)
+        return out
@@ -0,0 +1,35 @@
+import asyncio
+
+
+class ReplayMixin:
+    """Plays back recorded states in a frontend without simulating.
+
+    `states` is a (T, num_envs) array of `get_state` rows, e.g. the `state`
+    column of a TrajectoryRecorder (`states[:, [i]]` selects one env for the
+    single env frontends). Frames are restored into `sim_env` with `set_state`
+    and drawn by the frontend's `_show_state`.
+    """
+
+    def seek(self, states, t):
+        self.sim_env.set_state(states[t])
+        self._show_state()
+
+    async def play(self, states, start=0, stop=None, frame_skip=1, speed=1.0, dt=0.02):
+        """Show every `frame_skip`-th frame in [start, stop).
+
+        Frames were recorded `dt` apart and are played back `speed` times faster
+        than real time, `speed=None` shows them as fast as possible.
+        """
+        stop = len(states) if stop is None else min(stop, len(states))
+        delay = 0.0 if speed is None else dt * frame_skip / speed
+        for t in range(start, stop, frame_skip):
+            self.seek(states, t)
+            await asyncio.sleep(delay)
+
+    def _show_state(self):
+        """Required hook: draw the current state of `sim_env`.
+
+        Not an abstractmethod, the widgets also derive from anywidget.AnyWidget
+        whose traitlets metaclass conflicts with ABCMeta.
+        """
+        raise NotImplementedError(f"{type(self).__name__} must implement _show_state")
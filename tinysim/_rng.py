@@ -0,0 +1,36 @@
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(z):
+    # splitmix64 finalizer, a bijection on uint64 arrays
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class CounterRNG:
+    """One counter-based random stream per env, drawn for many envs at once.
+
+    The k-th draw of an env is a hash of (seed, global env id, k), so it does
+    not depend on the other envs in the batch. A batch split into shards, each
+    created with `env_offset` set to the global id of its first env, draws
+    exactly the same numbers as the unsplit batch.
+    """
+
+    def __init__(self, seed, num_envs, env_offset=0):
+        ids = np.arange(env_offset, env_offset + num_envs, dtype=np.uint64)
+        key = _mix(np.array([seed % 2**64], dtype=np.uint64))
+        self.state = _mix(key ^ _mix(ids * _GOLDEN + _GOLDEN))
+        self.counter = np.zeros(num_envs, dtype=np.uint64)
+
+    def random(self, envs):
+        """Next uniform [0, 1) float64 for each env index in `envs`."""
+        self.counter[envs] += np.uint64(1)
+        bits = _mix(self.state[envs] + self.counter[envs] * _GOLDEN)
+        return (bits >> np.uint64(11)) * 2.0**-53
+
+    def integers(self, low, high, envs):
+        """Next integer in [low, high) for each env index in `envs`."""
+        return low + (self.random(envs) * (high - low)).astype(np.int64)
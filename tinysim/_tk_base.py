@@ -9,6 +9,8 @@ class TkBaseFrontend(ABC):
         self._root = None
         self._canvas = None
         self._thread = None
+        # reusable canvas items per kind, [items, number shown]
+        self._pools = {}
 
     def render(self):
         if self._thread is not None:
@@ -25,6 +27,24 @@ class TkBaseFrontend(ABC):
     def _create_window(self, root):
         pass
 
+    def _pool(self, name, count, create):
+        """The first `count` items of a pool of canvas items reused across frames.
+
+        Missing items are made with `create(index)`, the items past `count` are
+        hidden until they are needed again. Frames move the items with
+        `coords` / `itemconfigure` instead of deleting and recreating them.
+        """
+        pool = self._pools.setdefault(name, [[], 0])
+        items, shown = pool
+        while len(items) < count:
+            items.append(create(len(items)))
+        for item in items[shown:count]:
+            self._canvas.itemconfigure(item, state="normal")
+        for item in items[count:shown]:
+            self._canvas.itemconfigure(item, state="hidden")
+        pool[1] = count
+        return items[:count]
+
     def bring_to_front(self, root):
         root.lift()
         root.attributes("-topmost", True)
@@ -39,6 +59,7 @@ class TkBaseFrontend(ABC):
                 pass
         self._root = None
         self._canvas = None
+        self._pools = {}
 
     def _pump(self):
         if not self._root:
@@ -0,0 +1,253 @@
+"""Throughput benchmarks for the tinysim and tinysim_warp environments.
+
+python -m tinysim.bench --num-envs 1 64 1024 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+NUM_ENVS = (1, 16, 256, 4096)
+# steps are cycled through this many pregenerated action batches
+ACTION_BATCHES = 16
+
+
+class _Unavailable(Exception):
+    """An optional env that cannot be built here, e.g. no OpenGL context for warp."""
+
+
+def _renderer_error(error):
+    # the warp examples create a pyglet OpenGL renderer even when headless, it
+    # fails without a display or OpenGL context, possibly wrapped by warp
+    while error is not None:
+        if isinstance(error, ImportError):
+            return True
+        if type(error).__module__.split(".")[0] in ("pyglet", "OpenGL"):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _flappy(num_envs, rng):
+    from .flappy import FlappyEnv
+
+    env = FlappyEnv(num_envs, array_obs=True, auto_reset=True)
+    actions = rng.random((ACTION_BATCHES, num_envs)) < 0.1
+    return lambda i: env.step(actions[i % ACTION_BATCHES])
+
+
+def _frogger(num_envs, rng):
+    from .frogger import FroggerEnv
+
+    env = FroggerEnv(num_envs, array_obs=True, auto_reset=True)
+    actions = rng.integers(0, 5, (ACTION_BATCHES, num_envs))
+    return lambda i: env.step(actions[i % ACTION_BATCHES])
+
+
+def _mountain_car(num_envs, rng):
+    from .mountain_car import MountainCarEnv
+
+    env = MountainCarEnv(num_envs, auto_reset=True)
+    actions = rng.integers(0, 3, (ACTION_BATCHES, num_envs))
+    return lambda i: env.step(actions[i % ACTION_BATCHES])
+
+
+def _topdown_driving(num_envs, rng):
+    from .topdown_driving import TopDownDrivingEnv
+
+    env = TopDownDrivingEnv(num_envs, auto_reset=True)
+    throttle = np.ones(num_envs, dtype=np.float32)
+    steer = rng.uniform(-1, 1, (ACTION_BATCHES, num_envs)).astype(np.float32)
+    return lambda i: env.step(
+        {"throttle": throttle, "steer": steer[i % ACTION_BATCHES]}
+    )
+
+
+def _warp_example(module, cls_name, actions_fn):
+    def make(num_envs, rng):
+        import importlib
+
+        import warp as wp
+
+        example_cls = getattr(importlib.import_module(module), cls_name)
+        try:
+            with wp.ScopedDevice("cpu"):
+                example = example_cls(headless=True, num_envs=num_envs)
+        except Exception as e:
+            if not _renderer_error(e):
+                raise
+            raise _Unavailable(f"{cls_name} renderer unavailable: {e!r}") from e
+        actions = [actions_fn(num_envs, rng) for _ in range(ACTION_BATCHES)]
+
+        def step(i):
+            with wp.ScopedDevice("cpu"):
+                example.step(actions[i % ACTION_BATCHES])
+
+        return step
+
+    return make
+
+
+BENCHMARKS = {
+    "flappy": (_flappy, None),
+    "frogger": (_frogger, None),
+    "mountain_car": (_mountain_car, None),
+    "topdown_driving": (_topdown_driving, None),
+    # the warp examples rebuild the whole scene per env, so their sweep is capped
+    "warp_cart_pole": (
+        _warp_example(
+            "tinysim_warp.cart_pole",
+            "CartPoleExample",
+            lambda n, rng: list(rng.integers(0, 3, n)),
+        ),
+        256,
+    ),
+    "warp_quadruped": (
+        _warp_example(
+            "tinysim_warp.quadruped",
+            "RobotDogExample",
+            lambda n, rng: rng.uniform(-1, 1, 12 * n).astype(np.float32),
+        ),
+        256,
+    ),
+    "warp_simple_quadruped": (
+        _warp_example(
+            "tinysim_warp.simple_quadruped",
+            "SimpleRobotDogExample",
+            lambda n, rng: rng.uniform(-1, 1, 8 * n).astype(np.float32),
+        ),
+        256,
+    ),
+}
+
+
+def run_benchmark(name, num_envs, steps=200, warmup=10, seed=0):
+    """Times `steps` calls to the env's step after `warmup` untimed ones."""
+    make, _ = BENCHMARKS[name]
+    step = make(num_envs, np.random.default_rng(seed))
+    for i in range(warmup):
+        step(i)
+
+    latency = np.empty(steps, dtype=np.float64)
+    start = time.perf_counter()
+    for i in range(steps):
+        t0 = time.perf_counter()
+        step(i)
+        latency[i] = time.perf_counter() - t0
+    total = time.perf_counter() - start
+
+    p50, p90, p99 = np.percentile(latency, [50, 90, 99]) * 1e3
+    return {
+        "env": name,
+        "num_envs": num_envs,
+        "steps": steps,
+        "total_s": total,
+        "steps_per_s": steps / total,
+        "env_steps_per_s": steps * num_envs / total,
+        "latency_ms": {
+            "mean": float(latency.mean() * 1e3),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": float(latency.max() * 1e3),
+        },
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(envs=None, num_envs=NUM_ENVS, steps=200, warmup=10, seed=0, log=None):
+    results, skipped = [], {}
+    for name in envs or BENCHMARKS:
+        max_envs = BENCHMARKS[name][1]
+        for n in num_envs:
+            if max_envs is not None and n > max_envs:
+                continue
+            try:
+                result = run_benchmark(name, n, steps, warmup, seed)
+            except (ImportError, _Unavailable) as e:
+                # optional dependency missing or unusable (warp), skip the whole env
+                skipped[name] = str(e)
+                break
+            results.append(result)
+            if log is not None:
+                log(
+                    f"{name:24s} num_envs={n:<6d} "
+                    f"{result['env_steps_per_s']:12.0f} env steps/s  "
+                    f"p50 {result['latency_ms']['p50']:.3f} ms  "
+                    f"p99 {result['latency_ms']['p99']:.3f} ms"
+                )
+        if name in skipped and log is not None:
+            log(f"{name:24s} skipped: {skipped[name]}")
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "steps": steps,
+            "warmup": warmup,
+            "seed": seed,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tinysim.bench",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--envs", nargs="+", choices=list(BENCHMARKS), default=None, help="Envs to run."
+    )
+    parser.add_argument(
+        "--num-envs", type=int, nargs="+", default=list(NUM_ENVS), help="Batch sizes."
+    )
+    parser.add_argument("--steps", type=int, default=200, help="Timed steps.")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed steps.")
+    parser.add_argument("--seed", type=int, default=0, help="Action RNG seed.")
+    parser.add_argument(
+        "--output", type=str, default="bench.json", help="JSON path, - for stdout."
+    )
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        args.envs,
+        args.num_envs,
+        args.steps,
+        args.warmup,
+        args.seed,
+        log=lambda msg: print(msg, file=sys.stderr),
+    )
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import numpy as np
-from .. import SimEnvironment
+from .. import SimEnvironment, _lazy_getattr
+from .._rng import CounterRNG
 
 WIDTH, HEIGHT = 800, 600
 GRAVITY = 900.0
@@ -8,61 +9,131 @@ PIPE_SPEED = -200.0
 PIPE_WIDTH = 80
 PIPE_GAP = 200
 PIPE_INTERVAL = 1.6
+MAX_PIPES = 4  # ring buffer capacity, at most 3 pipes are on screen at once
 
 BIRD_X = 200
 BIRD_SIZE = 35
 
 
 class FlappyEnv(SimEnvironment):
-    def __init__(self, num_envs: int = 1):
+    profiled_phases = (
+        "_step_physics",
+        "_update_pipes",
+        "_check_collisions",
+        "_output",
+        "_reset_envs",
+    )
+    state_fields = (
+        "bird_y",
+        "bird_vel",
+        "done",
+        "pipes_x",
+        "pipes_y",
+        "pipe_head",
+        "pipe_count",
+        "time_since_pipe",
+    )
+
+    def __init__(
+        self,
+        num_envs: int = 1,
+        array_obs: bool = False,
+        auto_reset: bool = False,
+        seed=None,
+        env_offset: int = 0,
+    ):
         self.num_envs = num_envs
+        # array_obs returns views of the state arrays (overwritten by the next step),
+        # batches always do, the list format is only built for a single env
+        self.array_obs = array_obs
+        # auto_reset reinitializes finished birds at the start of the next step
+        self.auto_reset = auto_reset
+        # seeded envs draw pipes from per env streams keyed by the global env id
+        # (env_offset + index), otherwise from the global numpy random state
+        self._rng = None if seed is None else CounterRNG(seed, num_envs, env_offset)
         self.reset()
 
-    def reset(self):
+    def reset(self, mask=None):
+        if mask is not None:
+            self._reset_envs(np.asarray(mask, dtype=bool))
+            return self._output()
+
         # birds (vectorized)
         self.bird_y = np.full(self.num_envs, HEIGHT / 2, dtype=np.float32)
         self.bird_vel = np.zeros(self.num_envs, dtype=np.float32)
         self.done = np.zeros(self.num_envs, dtype=bool)
 
-        # shared pipes
-        self.pipes_x = np.empty(0, dtype=np.float32)
-        self.pipes_y = np.empty(0, dtype=np.float32)
-        self.time_since_pipe = PIPE_INTERVAL
+        # per environment pipes stored in a ring buffer, empty slots have x = inf
+        self.pipes_x = np.full((self.num_envs, MAX_PIPES), np.inf, dtype=np.float32)
+        self.pipes_y = np.zeros((self.num_envs, MAX_PIPES), dtype=np.float32)
+        self.pipe_head = np.zeros(self.num_envs, dtype=np.int32)
+        self.pipe_count = np.zeros(self.num_envs, dtype=np.int32)
+        self.time_since_pipe = np.full(self.num_envs, PIPE_INTERVAL)
+        self._env_idx = np.arange(self.num_envs)
         return self.step(np.zeros(self.num_envs, dtype=np.int32), dt=0.0)
 
+    def _reset_envs(self, mask):
+        self.bird_y[mask] = HEIGHT / 2
+        self.bird_vel[mask] = 0.0
+        self.done[mask] = False
+
+        self.pipes_x[mask] = np.inf
+        self.pipe_head[mask] = 0
+        self.pipe_count[mask] = 0
+        self.time_since_pipe[mask] = PIPE_INTERVAL
+
+    def _state_arrays(self):
+        arrays = super()._state_arrays()
+        # a restored env continues the random stream of the env it was copied from
+        if self._rng is not None:
+            arrays["rng_state"] = self._rng.state
+            arrays["rng_counter"] = self._rng.counter
+        return arrays
+
     def _step_physics(self, action, dt):
         flap_mask = (action == 1) & (~self.done)
         self.bird_vel[flap_mask] = FLAP_STRENGTH
         self.bird_vel += GRAVITY * dt
         self.bird_y += self.bird_vel * dt
 
-    def _spawn_pipe(self):
-        pipe_y = np.random.randint(120, HEIGHT - 120 - PIPE_GAP)
-        self.pipes_x = np.append(self.pipes_x, WIDTH)
-        self.pipes_y = np.append(self.pipes_y, pipe_y)
+    def _spawn_pipes(self, mask):
+        envs = np.flatnonzero(mask & (self.pipe_count < MAX_PIPES))
+        tail = (self.pipe_head[envs] + self.pipe_count[envs]) % MAX_PIPES
+        self.pipes_x[envs, tail] = WIDTH
+        low, high = 120, HEIGHT - 120 - PIPE_GAP
+        if self._rng is None:
+            self.pipes_y[envs, tail] = np.random.randint(low, high, size=len(envs))
+        else:
+            self.pipes_y[envs, tail] = self._rng.integers(low, high, envs)
+        self.pipe_count[envs] += 1
 
     def _update_pipes(self, dt):
         self.time_since_pipe += dt
-        if self.time_since_pipe > PIPE_INTERVAL:
-            self.time_since_pipe = 0.0
-            self._spawn_pipe()
+        spawn = self.time_since_pipe > PIPE_INTERVAL
+        if spawn.any():
+            self.time_since_pipe[spawn] = 0.0
+            self._spawn_pipes(spawn)
 
         self.pipes_x += PIPE_SPEED * dt
 
-        # keep pipes on screen
-        keep = self.pipes_x > -PIPE_WIDTH
-        self.pipes_x = self.pipes_x[keep]
-        self.pipes_y = self.pipes_y[keep]
+        # keep pipes on screen, the oldest pipe is always at the head
+        head_x = self.pipes_x[self._env_idx, self.pipe_head]
+        expired = head_x <= -PIPE_WIDTH
+        if expired.any():
+            envs = np.flatnonzero(expired)
+            self.pipes_x[envs, self.pipe_head[envs]] = np.inf
+            self.pipe_head[envs] = (self.pipe_head[envs] + 1) % MAX_PIPES
+            self.pipe_count[envs] -= 1
 
     def _check_collisions(self):  # world bounds
         hit_bounds = (self.bird_y < 0) | (self.bird_y + BIRD_SIZE > HEIGHT)
         bx = BIRD_X
         by = self.bird_y[:, None]
-        px = self.pipes_x[None, :]
-        upper_y = np.zeros_like(self.pipes_y)[None, :]
-        upper_h = self.pipes_y[None, :]
-        lower_y = (self.pipes_y + PIPE_GAP)[None, :]
-        lower_h = (HEIGHT - (self.pipes_y + PIPE_GAP))[None, :]
+        px = self.pipes_x  # empty slots (x = inf) never overlap
+        upper_y = np.zeros_like(self.pipes_y)
+        upper_h = self.pipes_y
+        lower_y = self.pipes_y + PIPE_GAP
+        lower_h = HEIGHT - (self.pipes_y + PIPE_GAP)
         x_overlap = (bx < px + PIPE_WIDTH) & (bx + BIRD_SIZE > px)
         upper_hit = x_overlap & (by < upper_y + upper_h) & (by + BIRD_SIZE > upper_y)
         lower_hit = x_overlap & (by < lower_y + lower_h) & (by + BIRD_SIZE > lower_y)
@@ -70,6 +141,14 @@ class FlappyEnv(SimEnvironment):
         self.done |= hit_bounds | hit_pipe
 
     def step(self, action, dt=0.02):
+        return self.step_n(action, 1, dt)
+
+    def step_n(self, action, k, dt=0.02):
+        """Repeat `action` for k substeps of dt and return the final observation.
+
+        Same as k calls to step, except that auto_reset only applies before the
+        first substep.
+        """
         if np.isscalar(action):
             action = np.full(self.num_envs, action, dtype=np.float32)
         else:
@@ -79,25 +158,50 @@ class FlappyEnv(SimEnvironment):
                     f"Expected actions of shape ({self.num_envs},), got {action.shape}"
                 )
 
-        # mask done environments to have no action
-        action = action * (~self.done)
-        self._step_physics(action, dt)
-        self._update_pipes(dt)
-        self._check_collisions()
+        if self.auto_reset and self.done.any():
+            self._reset_envs(self.done.copy())
+
+        for _ in range(k):
+            # mask done environments to have no action
+            self._step_physics(action * (~self.done), dt)
+            self._update_pipes(dt)
+            self._check_collisions()
+        return self._output()
 
-        bird_y = self.bird_y.tolist()
-        bird_vel = self.bird_vel.tolist()
-        done = self.done.tolist()
+    def _output(self):
+        obs = self._observe()
+        if self.array_obs or self.num_envs > 1:
+            return obs
+        return self._as_lists(obs)
 
-        if self.num_envs == 1:
-            bird_y = self.bird_y[0]
-            bird_vel = self.bird_vel[0]
-            done = bool(self.done[0])
+    def _observe(self):
+        return {
+            "bird_y": self.bird_y,
+            "bird_vel": self.bird_vel,
+            "pipes_x": self.pipes_x,
+            "pipes_y": self.pipes_y,
+            "done": self.done,
+        }
 
+    def _as_lists(self, obs):
+        # list format of a single env used by the anywidget and tk frontends,
+        # the active pipes are listed in spawn order
+        slots = (self.pipe_head[0] + np.arange(self.pipe_count[0])) % MAX_PIPES
         return {
-            "bird_y": bird_y,
-            "bird_vel": bird_vel,
-            "pipes_x": self.pipes_x.tolist(),
-            "pipes_y": self.pipes_y.tolist(),
-            "done": done,
+            "bird_y": obs["bird_y"][0].item(),
+            "bird_vel": obs["bird_vel"][0].item(),
+            "pipes_x": obs["pipes_x"][0, slots].tolist(),
+            "pipes_y": obs["pipes_y"][0, slots].tolist(),
+            "done": obs["done"][0].item(),
         }
+
+
+# frontends (tkinter / anywidget) and the rasterizer are imported on first use
+__getattr__ = _lazy_getattr(
+    __name__,
+    {
+        "FlappyTkFrontend": ".tk",
+        "FlappySim": ".widget",
+        "FlappyRasterizer": ".raster",
+    },
+)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from .. import _raster
+from . import FlappyEnv, WIDTH, HEIGHT, PIPE_WIDTH, BIRD_SIZE, BIRD_X, PIPE_GAP
+
+
+class FlappyRasterizer(_raster.Rasterizer):
+    """Headless FlappyEnv frames, (num_envs, height, width, 3) uint8 per `render()`."""
+
+    def __init__(self, sim_env=None, size=(84, 84)):
+        if sim_env is None:
+            sim_env = FlappyEnv()
+        super().__init__(sim_env, size)
+        self.sx = self.width / WIDTH
+        self.sy = self.height / HEIGHT
+
+    def _background(self):
+        img = np.empty((1, self.height, self.width, 3), dtype=np.uint8)
+        img[:] = _raster.rgb("#70C5CE")
+        ground = (HEIGHT - 80) * self.height / HEIGHT
+        _raster.fill_rects(img, 0, ground, self.width, self.height, "#DED895")
+        return img[0]
+
+    def _draw(self, img):
+        env = self.sim_env
+        sx, sy = self.sx, self.sy
+
+        # bird, hidden once done
+        r = BIRD_SIZE * 0.5
+        by = np.where(env.done, np.inf, env.bird_y)
+        _raster.fill_ellipses(
+            img, (BIRD_X + r) * sx, (by + r) * sy, r * sx, r * sy, "#FFD700"
+        )
+
+        # pipes are full height column bands with a gap, empty slots are at x = inf
+        # and cover no column. Pixel c is inside [x0, x1) when its center is,
+        # c >= x0 - 0.5 and c < x1 - 0.5, as in fill_rects
+        x0 = (env.pipes_x * sx)[..., None] - 0.5
+        x1 = ((env.pipes_x + PIPE_WIDTH) * sx)[..., None] - 0.5
+        gap_top = (env.pipes_y * sy)[..., None] - 0.5
+        gap_bottom = ((env.pipes_y + PIPE_GAP) * sy)[..., None] - 0.5
+        c = np.arange(self.width, dtype=np.float32)
+        r = np.arange(self.height, dtype=np.float32)
+        cols = (c >= x0) & (c < x1)
+        rows = (r < gap_top) | (r >= gap_bottom)
+        _raster.fill_masked_bands(img, rows, cols, "#228B22")
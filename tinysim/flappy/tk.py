@@ -3,6 +3,7 @@ import asyncio
 try:
     import tkinter as tk
     from .. import _tk_base
+    from .._replay import ReplayMixin
 except ImportError:
     raise ImportError("tkinter is required for FlappyTkFrontend")
 
@@ -17,7 +18,7 @@ from . import (
 )
 
 
-class FlappyTkFrontend(_tk_base.TkBaseFrontend):
+class FlappyTkFrontend(_tk_base.TkBaseFrontend, ReplayMixin):
 
     def __init__(self, viewport_size=(800, 600), sim_env=None):
         super().__init__()
@@ -29,18 +30,24 @@ class FlappyTkFrontend(_tk_base.TkBaseFrontend):
 
     async def step(self, action, dt=0.02):
         state = self.sim_env.step(action, dt=dt)
-        if self._root:
-            self._root.after(0, lambda: self._draw_state(state))
-
+        self._show_state()
         await asyncio.sleep(dt)
         return state
 
     async def reset(self):
         state = self.sim_env.reset()
         if self._root:
-            self._draw_state(state)
+            self._draw_state(self._py_state())
         return state
 
+    def _py_state(self):
+        return self.sim_env._as_lists(self.sim_env._observe())
+
+    def _show_state(self):
+        if self._root:
+            py_state = self._py_state()
+            self._root.after(0, lambda: self._draw_state(py_state))
+
     def _create_window(self, root):
         w, h = self._viewport_size
         root.title("Flappy Bird")
@@ -49,7 +56,8 @@ class FlappyTkFrontend(_tk_base.TkBaseFrontend):
         self._root = root
         self._canvas = canvas
         self.bring_to_front(root)
-        self._draw_state(self.sim_env.reset())
+        self.sim_env.reset()
+        self._draw_state(self._py_state())
         self._pump()
         root.mainloop()
 
@@ -58,37 +66,32 @@ class FlappyTkFrontend(_tk_base.TkBaseFrontend):
             return
 
         canvas = self._canvas
-        canvas.delete("all")
-        canvas.create_rectangle(0, 0, WIDTH, HEIGHT, fill="#70C5CE", outline="")
-        canvas.create_rectangle(
-            0, HEIGHT - 80, WIDTH, HEIGHT, fill="#DED895", outline=""
-        )
 
-        # bird
-        by = state["bird_y"]
+        def create_bird(i):
+            return canvas.create_oval(0, 0, 0, 0, fill="#FFD700", outline="#000")
 
-        if not state.get("done", False):
-            canvas.create_oval(
-                BIRD_X,
-                by,
-                BIRD_X + BIRD_SIZE,
-                by + BIRD_SIZE,
-                fill="#FFD700",
-                outline="#000",
-            )
-
-        # pipes
-        for x, y in zip(state["pipes_x"], state["pipes_y"]):
-            # Upper pipe
-            canvas.create_rectangle(
-                x, 0, x + PIPE_WIDTH, y, fill="#228B22", outline="#4a8d34"
-            )
-            # Lower pipe
+        if not self._pools:
+            canvas.create_rectangle(0, 0, WIDTH, HEIGHT, fill="#70C5CE", outline="")
             canvas.create_rectangle(
-                x,
-                y + PIPE_GAP,
-                x + PIPE_WIDTH,
-                HEIGHT,
-                fill="#228B22",
-                outline="#4a8d34",
+                0, HEIGHT - 80, WIDTH, HEIGHT, fill="#DED895", outline=""
             )
+            # below the pipes even if the first frame hides it
+            self._pool("bird", 1, create_bird)
+
+        # bird
+        by = state["bird_y"]
+        done = state.get("done", False)
+        for bird in self._pool("bird", 0 if done else 1, create_bird):
+            canvas.coords(bird, BIRD_X, by, BIRD_X + BIRD_SIZE, by + BIRD_SIZE)
+
+        # pipes, an upper and a lower rectangle each
+        pipes = self._pool(
+            "pipe",
+            2 * len(state["pipes_x"]),
+            lambda i: canvas.create_rectangle(
+                0, 0, 0, 0, fill="#228B22", outline="#4a8d34"
+            ),
+        )
+        for i, (x, y) in enumerate(zip(state["pipes_x"], state["pipes_y"])):
+            canvas.coords(pipes[2 * i], x, 0, x + PIPE_WIDTH, y)
+            canvas.coords(pipes[2 * i + 1], x, y + PIPE_GAP, x + PIPE_WIDTH, HEIGHT)
@@ -6,9 +6,10 @@ from IPython.display import display
 from jupyter_ui_poll import ui_events
 
 from . import FlappyEnv
+from .._replay import ReplayMixin
 
 
-class FlappySim(anywidget.AnyWidget):
+class FlappySim(anywidget.AnyWidget, ReplayMixin):
     _esm = pathlib.Path(__file__).parent / "sim.js"
 
     sim_state = traitlets.Dict(default_value={}).tag(sync=True)
@@ -28,7 +29,14 @@ class FlappySim(anywidget.AnyWidget):
             raise ValueError("FlappySim currently only supports single environment.")
 
         self.sim_env = sim_env
-        self.sim_state = self.sim_env.reset()
+        self.sim_env.reset()
+        self.sim_state = self._py_state()
+
+    def _py_state(self):
+        return self.sim_env._as_lists(self.sim_env._observe())
+
+    def _show_state(self):
+        self.sim_state = self._py_state()
 
     def render(self):
         display(self)
@@ -42,12 +50,12 @@ class FlappySim(anywidget.AnyWidget):
 
     async def step(self, action, dt=0.02):
         state = self.sim_env.step(action, dt=dt)
-        self.sim_state = state
+        self._show_state()
         await asyncio.sleep(dt)
         return state
 
     async def reset(self):
         state = self.sim_env.reset()
-        self.sim_state = state
+        self.sim_state = self._py_state()
         await asyncio.sleep(0)
         return state
@@ -1,49 +1,151 @@
 import numpy as np
-from .. import SimEnvironment
+from .. import SimEnvironment, _lazy_getattr
 
 WIDTH, HEIGHT = 800, 600
 CELL = 40
 ROWS, COLS = HEIGHT // CELL, WIDTH // CELL
 
+# (dx, dy) per action: none, left, right, up, down
+ACTION_DELTAS = np.array([(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)])
+
 
 class FroggerEnv(SimEnvironment):
-    def __init__(self, num_envs=1):
+    # observations that describe the whole batch rather than one row per env
+    shared_obs_keys = ("grid",)
+    profiled_phases = (
+        "_update_traffic",
+        "_check_collisions",
+        "_update_score",
+        "_build_car_grid",
+        "_output",
+        "_reset_envs",
+    )
+    state_fields = ("frog_pos", "crossings", "score", "done")
+
+    def __init__(self, num_envs=1, array_obs=False, auto_reset=False):
         self.num_envs = num_envs
+        # array_obs returns views of the state arrays (overwritten by the next step)
+        self.array_obs = array_obs
+        # auto_reset reinitializes frogs that were hit at the start of the next step
+        self.auto_reset = auto_reset
         self.total_height = ROWS - 1
         self.num_cars_per_lane = 4
         self.car_width = CELL * 2
         self.traffic_rows = np.array([4, 5, 6, 8, 9])
         self.speeds = np.array([120, -150, 200, -180, 140], dtype=np.float32)
+
+        # Cars wrap around [wrap_min, wrap_min + wrap_span), so the traffic is a
+        # periodic function of time: car_x(t) = car_x0 + speed * t (mod wrap_span)
+        self.car_x0 = np.tile(
+            np.arange(self.num_cars_per_lane) * (WIDTH // self.num_cars_per_lane),
+            (len(self.traffic_rows), 1),
+        )
+        self.wrap_min = -self.car_width - 50
+        self.wrap_span = WIDTH + 50 - self.wrap_min
+        self._car_table = self._build_car_table()
         self.reset()
 
-    def reset(self):
+    def reset(self, mask=None):
+        if mask is not None:
+            self._reset_envs(np.asarray(mask, dtype=bool))
+            return self._output()
+
         # Frog positions for all environments (num_envs, 2)
         self.frog_pos = np.tile(np.array([COLS // 2, ROWS - 1]), (self.num_envs, 1))
 
-        # Cars (num_lanes, num_cars_per_lane)
-        self.car_x = np.zeros(
-            (len(self.traffic_rows), self.num_cars_per_lane), dtype=np.float32
+        # Car rects (num_lanes, num_cars_per_lane, [x, y, w, h])
+        self.car_rects = np.zeros(
+            (len(self.traffic_rows), self.num_cars_per_lane, 4), dtype=np.float32
         )
-        for i in range(self.num_cars_per_lane):
-            self.car_x[:, i] = i * (WIDTH // self.num_cars_per_lane)
+        self.car_rects[..., 1] = self.traffic_rows[:, None] * CELL + 8
+        self.car_rects[..., 2] = self.car_width
+        self.car_rects[..., 3] = CELL - 16
+
+        # Cars x positions (num_lanes, num_cars_per_lane), a view into car_rects
+        self.car_x = self.car_rects[..., 0]
+        self.time = 0.0
 
         # Score and crossings per environment
         self.crossings = np.zeros(self.num_envs, dtype=np.float32)
         self.score = np.zeros(self.num_envs, dtype=np.float32)
+        self.done = np.zeros(self.num_envs, dtype=bool)
+        self.grid = np.zeros((ROWS, COLS), dtype=bool)
         return self.step(np.zeros(self.num_envs, dtype=np.int32), dt=0.0)
 
+    def _reset_envs(self, mask):
+        # cars are shared by the batch, only the frogs are reset
+        self.frog_pos[mask] = [COLS // 2, ROWS - 1]
+        self.crossings[mask] = 0.0
+        self.score[mask] = 0.0
+        self.done[mask] = False
+
+    def _build_car_table(self):
+        # Occupied grid columns of one car, bitpacked to (wrap_span + 1, 2,
+        # ceil(COLS / 8)) and indexed by floor(x) - wrap_min and by whether the
+        # float32 sum x + car_width rounded up past floor(x) + car_width. Car
+        # widths and wrap bounds are integers, so the two floors pin the columns.
+        x0 = self.wrap_min + np.arange(self.wrap_span + 1)[:, None, None]
+        x1 = x0 + self.car_width + np.arange(2)[:, None]
+        col_start = np.clip(x0 // CELL, 0, COLS - 1)
+        col_end = np.clip(x1 // CELL, 0, COLS - 1)
+        cols = np.arange(COLS)
+        occupied = (cols >= col_start) & (cols <= col_end)
+        return np.packbits(occupied, axis=-1)
+
+    def _traffic_shift(self):
+        # per lane displacement of the traffic in [0, wrap_span)
+        shift = np.multiply(self.speeds, self.time, dtype=np.float64)
+        return np.mod(shift, self.wrap_span)
+
+    def _update_traffic(self):
+        shift = self._traffic_shift()[:, None]
+        self.car_x[:] = self.wrap_min + np.mod(
+            self.car_x0 - self.wrap_min + shift, self.wrap_span
+        )
+
     def _build_car_grid(self):
-        grid = np.zeros((ROWS, COLS), dtype=bool)
-        for lane_idx, row in enumerate(self.traffic_rows):
-            x0 = self.car_x[lane_idx, :]
-            x1 = x0 + self.car_width
-            col_start = np.clip((x0 // CELL).astype(int), 0, COLS - 1)
-            col_end = np.clip((x1 // CELL).astype(int), 0, COLS - 1)
-            for start, end in zip(col_start, col_end):
-                grid[row, start : end + 1] = True
-        return grid
+        # table rows of the same float32 car_x the collisions use, or-ed per lane
+        x0 = np.floor(self.car_x)
+        carry = np.floor(self.car_x + self.car_width) - x0 > self.car_width
+        offset = x0.astype(np.intp) - self.wrap_min
+        np.clip(offset, 0, self.wrap_span, out=offset)
+        cars = self._car_table[offset, carry.astype(np.intp)]
+        lanes = np.bitwise_or.reduce(cars, axis=1)
+        self.grid[self.traffic_rows] = np.unpackbits(lanes, axis=-1, count=COLS)
+        return self.grid
+
+    def set_time(self, t):
+        """Jump the (shared) traffic to simulation time t."""
+        self.time = float(t)
+        self._update_traffic()
+        self._build_car_grid()
+
+    def _state_arrays(self):
+        arrays = super()._state_arrays()
+        arrays["time"] = np.full(self.num_envs, self.time)
+        return arrays
+
+    def set_state(self, state, indices=None):
+        # the traffic clock is shared by the batch, so all restored rows must agree
+        times = np.unique(state["time"])
+        if len(times) > 1:
+            raise ValueError(
+                "FroggerEnv traffic is shared by the batch, "
+                f"cannot restore states from different times {times.tolist()}"
+            )
+        super().set_state(state, indices)
+        if len(times):
+            self.set_time(times[0])
 
     def step(self, action, dt=0.01):
+        return self.step_n(action, 1, dt)
+
+    def step_n(self, action, k, dt=0.01):
+        """Repeat `action` for k substeps of dt and return the final observation.
+
+        Same as k calls to step, except that auto_reset only applies before the
+        first substep and done reports a hit in any of the substeps.
+        """
         if np.isscalar(action):
             action = np.full(self.num_envs, action, dtype=np.float32)
         else:
@@ -52,94 +154,82 @@ class FroggerEnv(SimEnvironment):
                 raise ValueError(
                     f"Expected actions of shape ({self.num_envs},), got {action.shape}"
                 )
-        action_map = {
-            0: (0, 0),
-            1: (-1, 0),
-            2: (1, 0),
-            3: (0, -1),
-            4: (0, 1),
-        }
-        dx = np.array([action_map[a][0] for a in action])
-        dy = np.array([action_map[a][1] for a in action])
-
-        # Move frogs
-        self.frog_pos[:, 0] = np.clip(self.frog_pos[:, 0] + dx, 0, COLS - 1)
-        self.frog_pos[:, 1] = np.clip(self.frog_pos[:, 1] + dy, 0, ROWS - 1)
-
-        # Update car positions
-        self.car_x += self.speeds[:, None] * dt
-
-        # Wrap cars
-        pos_mask_pos = self.speeds[:, None] > 0
-        pos_mask_neg = self.speeds[:, None] < 0
-        self.car_x[pos_mask_pos & (self.car_x > WIDTH + 50)] = -self.car_width - 50
-        self.car_x[pos_mask_neg & (self.car_x < -self.car_width - 50)] = WIDTH + 50
-
-        done = np.zeros(self.num_envs, dtype=bool)
-        frog_rects = np.stack(
-            [
-                self.frog_pos[:, 0] * CELL,
-                self.frog_pos[:, 1] * CELL,
-                np.full(self.num_envs, CELL),
-                np.full(self.num_envs, CELL),
-            ],
-            axis=1,
-        )
-
-        self.car_rects = []
-        for lane_idx, row in enumerate(self.traffic_rows):
-            self.car_rects.append(
-                np.stack(
-                    [
-                        self.car_x[lane_idx, :],  # x positions
-                        np.full(self.num_cars_per_lane, row * CELL + 8),  # y positions
-                        np.full(self.num_cars_per_lane, self.car_width),  # widths
-                        np.full(self.num_cars_per_lane, CELL - 16),  # heights
-                    ],
-                    axis=1,
-                )
-            )  # shape: (num_cars_per_lane, 4)
-
-        for env_idx in range(self.num_envs):
-            ax, ay, aw, ah = frog_rects[env_idx]
-            collision = False
-            for car_rects in self.car_rects:
-                bx, by, bw, bh = (
-                    car_rects[:, 0],
-                    car_rects[:, 1],
-                    car_rects[:, 2],
-                    car_rects[:, 3],
-                )
-                overlap = (
-                    (ax < bx + bw) & (ax + aw > bx) & (ay < by + bh) & (ay + ah > by)
-                )
-                if np.any(overlap):
-                    collision = True
-                    break
-            done[env_idx] = collision
-
+        if self.auto_reset and self.done.any():
+            self._reset_envs(self.done.copy())
+
+        index = action.astype(np.intp)
+        if ((index != action) | (index < 0) | (index >= len(ACTION_DELTAS))).any():
+            raise ValueError(
+                f"Actions must be integers in [0, {len(ACTION_DELTAS)}), got {action}"
+            )
+        dx, dy = ACTION_DELTAS[index].T
+        hit = np.zeros(self.num_envs, dtype=bool)
+
+        for _ in range(k):
+            # Move frogs
+            self.frog_pos[:, 0] = np.clip(self.frog_pos[:, 0] + dx, 0, COLS - 1)
+            self.frog_pos[:, 1] = np.clip(self.frog_pos[:, 1] + dy, 0, ROWS - 1)
+
+            # Update car positions
+            self.time += dt
+            self._update_traffic()
+
+            self._check_collisions()
+            hit |= self.done
+            self._update_score()
+
+        np.copyto(self.done, hit)
+        self._build_car_grid()
+        return self._output()
+
+    def _check_collisions(self):
+        # Frog vs car overlap broadcast over (num_envs, num_lanes, num_cars_per_lane)
+        fx = (self.frog_pos[:, 0] * CELL)[:, None, None]
+        fy = (self.frog_pos[:, 1] * CELL)[:, None, None]
+        bx, by, bw, bh = np.moveaxis(self.car_rects, -1, 0)
+        overlap = (fx < bx + bw) & (fx + CELL > bx) & (fy < by + bh) & (fy + CELL > by)
+        overlap.any(axis=(1, 2), out=self.done)
+
+    def _update_score(self):
         # Handle frogs that reached the top
         reached_top = self.frog_pos[:, 1] == 0
         self.crossings[reached_top] += 1
         self.frog_pos[reached_top] = [COLS // 2, ROWS - 1]
 
-        # Update score
         current_height = self.total_height - self.frog_pos[:, 1]
-        self.score = self.crossings + current_height / self.total_height
-
-        frog_pos = self.frog_pos.tolist()
-        grid = self._build_car_grid().tolist()
-        scores = self.score.tolist()
-        done = done.tolist()
+        np.divide(current_height, self.total_height, out=self.score)
+        self.score += self.crossings
 
-        if self.num_envs == 1:
-            frog_pos = frog_pos[0]
-            done = done[0]
-            scores = scores[0]
+    def _output(self):
+        obs = self._observe()
+        if self.array_obs:
+            return obs
+        return self._as_lists(obs)
 
+    def _observe(self):
         return {
-            "frog_pos": frog_pos,
-            "grid": grid,
-            "done": done,
-            "score": scores,
+            "frog_pos": self.frog_pos,
+            "grid": self.grid,
+            "done": self.done,
+            "score": self.score,
         }
+
+    def _as_lists(self, obs):
+        # list format used by the anywidget and tk frontends
+        state = {key: value.tolist() for key, value in obs.items()}
+        if self.num_envs == 1:
+            state["frog_pos"] = state["frog_pos"][0]
+            state["done"] = state["done"][0]
+            state["score"] = state["score"][0]
+        return state
+
+
+# frontends (tkinter / anywidget) and the rasterizer are imported on first use
+__getattr__ = _lazy_getattr(
+    __name__,
+    {
+        "FroggerTkFrontend": ".tk",
+        "FroggerWidget": ".widget",
+        "FroggerRasterizer": ".raster",
+    },
+)
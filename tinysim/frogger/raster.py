@@ -0,0 +1,41 @@
+import numpy as np
+
+from .. import _raster
+from . import FroggerEnv, WIDTH, HEIGHT, CELL, ROWS
+
+
+class FroggerRasterizer(_raster.Rasterizer):
+    """Headless FroggerEnv frames, (num_envs, height, width, 3) uint8 per `render()`."""
+
+    def __init__(self, sim_env=None, size=(84, 84)):
+        if sim_env is None:
+            sim_env = FroggerEnv()
+        super().__init__(sim_env, size)
+
+    def _background(self):
+        sx, sy = self.width / WIDTH, self.height / HEIGHT
+        img = np.empty((1, self.height, self.width, 3), dtype=np.uint8)
+        img[:] = _raster.rgb("#1E1E1E")
+        # safe zones
+        _raster.fill_rects(img, 0, 0, self.width, CELL * sy, "#000050")
+        _raster.fill_rects(
+            img, 0, (ROWS - 1) * CELL * sy, WIDTH * sx, self.height, "#004000"
+        )
+        return img[0]
+
+    def _draw(self, img):
+        env = self.sim_env
+        sx, sy = self.width / WIDTH, self.height / HEIGHT
+
+        # the traffic is shared by the batch, drawn once and copied
+        x, y, w, h = np.moveaxis(env.car_rects.reshape(1, -1, 4), -1, 0)
+        _raster.fill_rects(
+            img[:1], x * sx, y * sy, (x + w) * sx, (y + h) * sy, "#B43232"
+        )
+        img[1:] = img[0]
+
+        # frogs
+        fx = (env.frog_pos[:, 0] + 0.5) * CELL * sx
+        fy = (env.frog_pos[:, 1] + 0.5) * CELL * sy
+        r = CELL * 0.5 - 5
+        _raster.fill_ellipses(img, fx, fy, r * sx, r * sy, "#32DC32")
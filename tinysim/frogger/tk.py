@@ -4,11 +4,12 @@ from . import FroggerEnv, WIDTH, HEIGHT, CELL, ROWS, COLS
 try:
     import tkinter as tk
     from .. import _tk_base
+    from .._replay import ReplayMixin
 except ImportError:
     raise ImportError("tkinter is required for FroggerTkFrontend")
 
 
-class FroggerTkFrontend(_tk_base.TkBaseFrontend):
+class FroggerTkFrontend(_tk_base.TkBaseFrontend, ReplayMixin):
 
     def __init__(self, viewport_size=(800, 600), sim_env=None):
         super().__init__()
@@ -23,12 +24,14 @@ class FroggerTkFrontend(_tk_base.TkBaseFrontend):
 
     async def step(self, action, dt=0.01):
         state = self.sim_env.step(action, dt=dt)
-        if self._root:
-            self._root.after(0, lambda: self._draw_state(self.sim_env))
-
+        self._show_state()
         await asyncio.sleep(dt)
         return state
 
+    def _show_state(self):
+        if self._root:
+            self._root.after(0, lambda: self._draw_state(self.sim_env))
+
     async def reset(self):
         state = self.sim_env.reset()
         if self._canvas:
@@ -47,12 +50,8 @@ class FroggerTkFrontend(_tk_base.TkBaseFrontend):
         self._pump()
         root.mainloop()
 
-    def _draw_state(self, sim_env: FroggerEnv):
-        if not self._canvas:
-            return
-
+    def _draw_background(self):
         canvas = self._canvas
-        canvas.delete("all")
 
         # safe zones
         canvas.create_rectangle(0, 0, WIDTH, CELL, fill="#000050", outline="")
@@ -60,10 +59,32 @@ class FroggerTkFrontend(_tk_base.TkBaseFrontend):
             0, (ROWS - 1) * CELL, WIDTH, HEIGHT, fill="#004000", outline=""
         )
 
+        # grid, kept above the cars and the frog
+        for r in range(ROWS):
+            y = r * CELL
+            canvas.create_line(0, y, WIDTH, y, fill="#282828", tags="grid")
+        for c in range(COLS):
+            x = c * CELL
+            canvas.create_line(x, 0, x, HEIGHT, fill="#282828", tags="grid")
+
+    def _draw_state(self, sim_env: FroggerEnv):
+        if not self._canvas:
+            return
+
+        canvas = self._canvas
+        first = not self._pools
+        if first:
+            self._draw_background()
+
         # cars
-        for lane_rects in sim_env.car_rects:  # lane_rects shape: (num_cars_per_lane, 4)
-            for x, y, w, h in lane_rects:
-                canvas.create_rectangle(x, y, x + w, y + h, fill="#B43232", outline="")
+        rects = sim_env.car_rects.reshape(-1, 4)
+        cars = self._pool(
+            "car",
+            len(rects),
+            lambda i: canvas.create_rectangle(0, 0, 0, 0, fill="#B43232", outline=""),
+        )
+        for item, (x, y, w, h) in zip(cars, rects.tolist()):
+            canvas.coords(item, x, y, x + w, y + h)
 
         # frog
         fx, fy, fw, fh = (
@@ -72,24 +93,21 @@ class FroggerTkFrontend(_tk_base.TkBaseFrontend):
             CELL,
             CELL,
         )
-        canvas.create_oval(
-            fx + 5, fy + 5, fx + fw - 5, fy + fh - 5, fill="#32DC32", outline=""
+        (frog,) = self._pool(
+            "frog",
+            1,
+            lambda i: canvas.create_oval(0, 0, 0, 0, fill="#32DC32", outline=""),
         )
-
-        # grid
-        for r in range(ROWS):
-            y = r * CELL
-            canvas.create_line(0, y, WIDTH, y, fill="#282828")
-        for c in range(COLS):
-            x = c * CELL
-            canvas.create_line(x, 0, x, HEIGHT, fill="#282828")
+        canvas.coords(frog, fx + 5, fy + 5, fx + fw - 5, fy + fh - 5)
+        if first:
+            canvas.tag_raise("grid")
 
         # score
-        canvas.create_text(
-            10,
-            10,
-            anchor="nw",
-            text=f"Score: {sim_env.score[0]:.2f}",
-            fill="white",
-            font=("Arial", 16),
+        (score,) = self._pool(
+            "score",
+            1,
+            lambda i: canvas.create_text(
+                10, 10, anchor="nw", fill="white", font=("Arial", 16)
+            ),
         )
+        canvas.itemconfigure(score, text=f"Score: {sim_env.score[0]:.2f}")
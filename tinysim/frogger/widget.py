@@ -7,9 +7,10 @@ from IPython.display import display
 from jupyter_ui_poll import ui_events
 
 from . import FroggerEnv
+from .._replay import ReplayMixin
 
 
-class FroggerWidget(anywidget.AnyWidget):
+class FroggerWidget(anywidget.AnyWidget, ReplayMixin):
     _esm = pathlib.Path(__file__).parent / "sim.js"
 
     sim_state = traitlets.Dict(default_value={}).tag(sync=True)
@@ -34,7 +35,15 @@ class FroggerWidget(anywidget.AnyWidget):
             )
 
         self.sim_env = sim_env
-        self.sim_state = self.sim_env.reset()
+        self.sim_env.reset()
+        self.sim_state = self._py_state()
+        self.car_positions = self.get_car_positions()
+
+    def _py_state(self):
+        return self.sim_env._as_lists(self.sim_env._observe())
+
+    def _show_state(self):
+        self.sim_state = self._py_state()
         self.car_positions = self.get_car_positions()
 
     def render(self):
@@ -49,12 +58,11 @@ class FroggerWidget(anywidget.AnyWidget):
 
     async def step(self, action: int, dt: float = 0.01) -> dict:
         sim_state = self.sim_env.step(action)
-        self.sim_state = sim_state
-        self.car_positions = self.get_car_positions()
+        self._show_state()
         await asyncio.sleep(dt)
         return sim_state
 
     async def reset(self) -> dict:
         sim_state = self.sim_env.reset()
-        self.sim_state = sim_state
+        self.sim_state = self._py_state()
         return sim_state
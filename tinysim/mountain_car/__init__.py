@@ -1,10 +1,15 @@
 import numpy as np
-from .. import SimEnvironment
+from .. import SimEnvironment, _lazy_getattr
 
 
 class MountainCarEnv(SimEnvironment):
-    def __init__(self, num_envs: int = 1):
+    profiled_phases = ("_step_physics",)
+    state_fields = ("position", "velocity", "done")
+
+    def __init__(self, num_envs: int = 1, auto_reset: bool = False):
         self.num_envs = num_envs
+        # auto_reset reinitializes cars that reached the goal at the start of the next step
+        self.auto_reset = auto_reset
         # environment constants
         self.min_position = -1.2
         self.max_position = 0.6
@@ -13,11 +18,26 @@ class MountainCarEnv(SimEnvironment):
         self.gravity = 0.0025
         self.goal_position = 0.5
 
-        # initial state
+        # state, updated in place by step/reset
         self.position = np.full(num_envs, -0.5, dtype=np.float32)
         self.velocity = np.zeros(num_envs, dtype=np.float32)
+        self.done = np.zeros(num_envs, dtype=bool)
+
+        # scratch buffers
+        self._accel = np.empty(num_envs, dtype=np.float32)
+        self._force = np.empty(num_envs, dtype=np.float32)
+        self._wall = np.empty(num_envs, dtype=bool)
+        self._reached = np.empty(num_envs, dtype=bool)
 
     def step(self, action) -> dict:
+        return self.step_n(action, 1)
+
+    def step_n(self, action, k) -> dict:
+        """Repeat `action` for k substeps and return the final observation.
+
+        Same as k calls to step, except that auto_reset only applies before the
+        first substep and done reports reaching the goal in any of the substeps.
+        """
         if np.isscalar(action):
             action = np.full(self.num_envs, action, dtype=np.float32)
         else:
@@ -27,30 +47,59 @@ class MountainCarEnv(SimEnvironment):
                     f"Expected actions of shape ({self.num_envs},), got {action.shape}"
                 )
 
-        force_term = (action - 1.0) * self.force
-        self.velocity += force_term + np.cos(3 * self.position) * (-self.gravity)
-        self.velocity = np.clip(self.velocity, -self.max_speed, self.max_speed)
+        if self.auto_reset and self.done.any():
+            self._reset_envs(self.done.copy())
+
+        np.subtract(action, 1.0, out=self._force)
+        self._force *= self.force
+        self.done.fill(False)
+        for _ in range(k):
+            self._step_physics()
+        return self._observe()
+
+    def _step_physics(self):
+        # velocity += (action - 1) * force - cos(3 * position) * gravity
+        np.multiply(self.position, 3, out=self._accel)
+        np.cos(self._accel, out=self._accel)
+        self._accel *= -self.gravity
+        self._accel += self._force
+        self.velocity += self._accel
+        np.clip(self.velocity, -self.max_speed, self.max_speed, out=self.velocity)
 
         self.position += self.velocity
-        self.position = np.clip(self.position, self.min_position, self.max_position)
+        np.clip(self.position, self.min_position, self.max_position, out=self.position)
 
         # handle collision with left wall
-        wall_mask = (self.position == self.min_position) & (self.velocity < 0)
-        self.velocity[wall_mask] = 0.0
-        done = self.position >= self.goal_position
-
-        if self.num_envs == 1:
-            self.position = float(self.position[0])
-            self.velocity = float(self.velocity[0])
-            done = bool(done[0])
-
-        return {"position": self.position, "velocity": self.velocity, "done": done}
-
-    def reset(self) -> dict:
-        self.position = -0.5
-        self.velocity = 0.0
-        return {
-            "position": self.position,
-            "velocity": self.velocity,
-            "done": self.position >= self.goal_position,
-        }
+        np.equal(self.position, self.min_position, out=self._wall)
+        self._wall &= self.velocity < 0
+        np.copyto(self.velocity, 0.0, where=self._wall)
+        np.greater_equal(self.position, self.goal_position, out=self._reached)
+        self.done |= self._reached
+
+    def reset(self, mask=None) -> dict:
+        if mask is None:
+            self.position.fill(-0.5)
+            self.velocity.fill(0.0)
+            self.done.fill(False)
+        else:
+            self._reset_envs(np.asarray(mask, dtype=bool))
+        return self._observe()
+
+    def _reset_envs(self, mask):
+        self.position[mask] = -0.5
+        self.velocity[mask] = 0.0
+        self.done[mask] = False
+
+    def _observe(self):
+        return {"position": self.position, "velocity": self.velocity, "done": self.done}
+
+
+# frontends (tkinter / anywidget) and the rasterizer are imported on first use
+__getattr__ = _lazy_getattr(
+    __name__,
+    {
+        "MountainCarTkFrontend": ".tk",
+        "MountainCarWidget": ".widget",
+        "MountainCarRasterizer": ".raster",
+    },
+)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from .. import _raster
+from . import MountainCarEnv
+
+# car size in world units, about the size drawn by the tk frontend
+CAR_WIDTH = 0.12
+CAR_HEIGHT = 0.06
+WHEEL_RADIUS = 0.024
+CLEARANCE = 0.03
+# visible height in world units
+VIEW_HEIGHT = 1.2
+COLORS = np.array(
+    [_raster.rgb(c) for c in ("#ff0000", "#00aa00", "#0000ff", "#ffaa00")]
+)
+
+
+def height_fn(x):
+    return np.sin(3 * x) * 0.45 + 0.55
+
+
+class MountainCarRasterizer(_raster.Rasterizer):
+    """Headless MountainCarEnv frames, (num_envs, height, width, 3) uint8 per `render()`."""
+
+    def __init__(self, sim_env=None, size=(84, 84)):
+        if sim_env is None:
+            sim_env = MountainCarEnv()
+        super().__init__(sim_env, size)
+
+    def _to_screen(self, x, y):
+        env = self.sim_env
+        sx = self.width / (env.max_position - env.min_position)
+        sy = self.height / VIEW_HEIGHT
+        return (x - env.min_position) * sx, self.height - y * sy
+
+    def _background(self):
+        env = self.sim_env
+        img = np.empty((1, self.height, self.width, 3), dtype=np.uint8)
+        img[:] = _raster.rgb("#eeeeee")
+
+        # terrain, filled below the surface at each pixel column center
+        world_width = env.max_position - env.min_position
+        x = env.min_position + (np.arange(self.width) + 0.5) / self.width * world_width
+        _, ground = self._to_screen(x, height_fn(x))
+        columns = np.arange(self.width)
+        _raster.fill_rects(img, columns, ground, columns + 1, self.height, "#444444")
+
+        # goal flag
+        gx, gy = self._to_screen(env.goal_position, height_fn(env.goal_position))
+        pole = 0.12 * self.height / VIEW_HEIGHT
+        _raster.fill_rects(img, gx, gy - pole, gx + 1, gy, "#000000")
+        _raster.fill_rects(
+            img, gx + 1, gy - pole, gx + pole * 0.6, gy - pole * 0.75, "#ffff00"
+        )
+        return img[0]
+
+    def _draw(self, img):
+        env = self.sim_env
+        x = env.position
+        sx = self.width / (env.max_position - env.min_position)
+        sy = self.height / VIEW_HEIGHT
+
+        # contact point above the terrain, tilted with the slope
+        cx, cy = self._to_screen(x, height_fn(x))
+        cy = cy - CLEARANCE * sy
+        angle = -np.arctan(np.cos(3 * x))
+        cos, sin = np.cos(angle), np.sin(angle)
+        colors = COLORS[np.arange(env.num_envs) % len(COLORS)]
+
+        hh = CAR_HEIGHT * 0.5 * sy
+        _raster.fill_rotated_rects(
+            img, cx + hh * sin, cy - hh * cos, CAR_WIDTH * 0.5 * sx, hh, angle, colors
+        )
+        offset = np.array([-1.0, 1.0]) * CAR_WIDTH / 3 * sx
+        _raster.fill_ellipses(
+            img,
+            cx[:, None] + offset * cos[:, None],
+            cy[:, None] + offset * sin[:, None],
+            WHEEL_RADIUS * sy,
+            WHEEL_RADIUS * sy,
+            "#777777",
+        )
@@ -6,11 +6,16 @@ from . import MountainCarEnv
 try:
     import tkinter as tk
     from .. import _tk_base
+    from .._replay import ReplayMixin
 except ImportError:
     raise ImportError("tkinter is required for MountainCarTkFrontend")
 
 
-class MountainCarTkFrontend(_tk_base.TkBaseFrontend):
+def height_fn(x):
+    return np.sin(3 * x) * 0.45 + 0.55
+
+
+class MountainCarTkFrontend(_tk_base.TkBaseFrontend, ReplayMixin):
 
     def __init__(self, viewport_size=(600, 400), sim_env=None):
         super().__init__()
@@ -18,16 +23,19 @@ class MountainCarTkFrontend(_tk_base.TkBaseFrontend):
             sim_env = MountainCarEnv()
         self.sim_env = sim_env
         self._viewport_size = viewport_size
+        self._scene_size = None
 
     async def step(self, action, dt=0.01):
         state = self.sim_env.step(action)
+        self._show_state()
+        await asyncio.sleep(dt)
+        return state
 
+    def _show_state(self):
         if self._root:
+            state = self.sim_env._observe()
             self._root.after(0, lambda s=state: self._draw_state(s))
 
-        await asyncio.sleep(dt)
-        return state
-
     async def reset(self):
         state = self.sim_env.reset()
         if self._canvas:
@@ -46,40 +54,33 @@ class MountainCarTkFrontend(_tk_base.TkBaseFrontend):
         self._pump()
         root.mainloop()
 
-    def _draw_state(self, state: dict):
-        if not self._canvas:
-            return
-
+    def _draw_scene(self, w, h):
+        # terrain and goal, redrawn only when the canvas size changes
         c = self._canvas
-        w = int(c.winfo_width() or self._viewport_size[0])
-        h = int(c.winfo_height() or self._viewport_size[1])
-        c.delete("all")
+        c.delete("scene")
+        self._scene_size = (w, h)
 
         min_x = self.sim_env.min_position
         max_x = self.sim_env.max_position
         world_width = max_x - min_x
         scale = w / world_width
-        clearance = 10
-
-        def heightFn(x):
-            return np.sin(3 * x) * 0.45 + 0.55
 
         # Terrain
         terrain_pts = []
         for px in range(w):
             x_world = min_x + px / w * world_width
-            y_world = heightFn(x_world)
-            y_screen = h - y_world * scale
-            terrain_pts.append((px, y_screen))
-        for i in range(len(terrain_pts) - 1):
-            c.create_line(*terrain_pts[i], *terrain_pts[i + 1], fill="#444444", width=2)
+            y_world = height_fn(x_world)
+            terrain_pts.extend((px, h - y_world * scale))
+        c.create_line(*terrain_pts, fill="#444444", width=2, tags="scene")
 
         # Goal
         gx = self.sim_env.goal_position
-        gy = heightFn(gx)
+        gy = height_fn(gx)
         goal_x = (gx - min_x) * scale
         goal_y = h - gy * scale
-        c.create_line(goal_x, goal_y, goal_x, goal_y - 40, fill="#000", width=2)
+        c.create_line(
+            goal_x, goal_y, goal_x, goal_y - 40, fill="#000", width=2, tags="scene"
+        )
         c.create_polygon(
             goal_x,
             goal_y - 40,
@@ -89,7 +90,24 @@ class MountainCarTkFrontend(_tk_base.TkBaseFrontend):
             goal_y - 30,
             fill="#ffff00",
             outline="",
+            tags="scene",
         )
+        c.tag_lower("scene")
+
+    def _draw_state(self, state: dict):
+        if not self._canvas:
+            return
+
+        c = self._canvas
+        w = int(c.winfo_width() or self._viewport_size[0])
+        h = int(c.winfo_height() or self._viewport_size[1])
+        if self._scene_size != (w, h) or not self._pools:
+            self._draw_scene(w, h)
+
+        min_x = self.sim_env.min_position
+        max_x = self.sim_env.max_position
+        scale = w / (max_x - min_x)
+        clearance = 10
 
         # Draw each car
         positions = np.atleast_1d(state["position"])
@@ -101,9 +119,29 @@ class MountainCarTkFrontend(_tk_base.TkBaseFrontend):
             return px * c0 - py * s, px * s + py * c0
 
         colors = ["#ff0000", "#00aa00", "#0000ff", "#ffaa00"]
+        bodies = self._pool(
+            "body",
+            len(positions),
+            lambda i: c.create_polygon(
+                0,
+                0,
+                0,
+                0,
+                0,
+                0,
+                fill=colors[i % len(colors)],
+                outline="",
+                stipple="gray75",
+            ),
+        )
+        wheels = self._pool(
+            "wheel",
+            2 * len(positions),
+            lambda i: c.create_oval(0, 0, 0, 0, fill="#777777", outline=""),
+        )
 
         for i, x_world in enumerate(positions):
-            y_world = heightFn(x_world)
+            y_world = height_fn(x_world)
             x_screen = (x_world - min_x) * scale
             y_screen = h - y_world * scale - clearance
 
@@ -120,22 +158,18 @@ class MountainCarTkFrontend(_tk_base.TkBaseFrontend):
             body_screen = []
             for px, py in body_local:
                 rx, ry = rot(px, py, angle)
-                body_screen.append((x_screen + rx, y_screen + ry))
-
-            c.create_polygon(
-                body_screen, fill=colors[i % len(colors)], outline="", stipple="gray75"
-            )
+                body_screen.extend((x_screen + rx, y_screen + ry))
+            c.coords(bodies[i], *body_screen)
 
             # wheels
-            for wx in (-car_width / 3, car_width / 3):
+            for j, wx in enumerate((-car_width / 3, car_width / 3)):
                 rx, ry = rot(wx, 0, angle)
                 cx = x_screen + rx
                 cy = y_screen + ry
-                c.create_oval(
+                c.coords(
+                    wheels[2 * i + j],
                     cx - wheel_r,
                     cy - wheel_r,
                     cx + wheel_r,
                     cy + wheel_r,
-                    fill="#777777",
-                    outline="",
                 )
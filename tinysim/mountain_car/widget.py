@@ -6,9 +6,10 @@ from IPython.display import display
 from jupyter_ui_poll import ui_events
 
 from . import MountainCarEnv
+from .._replay import ReplayMixin
 
 
-class MountainCarWidget(anywidget.AnyWidget):
+class MountainCarWidget(anywidget.AnyWidget, ReplayMixin):
     _esm = pathlib.Path(__file__).parent / "sim.js"
     _css = pathlib.Path(__file__).parent / "styles.css"
 
@@ -32,7 +33,17 @@ class MountainCarWidget(anywidget.AnyWidget):
             )
 
         self.sim_env = sim_env
-        self.sim_state = self.sim_env.reset()
+        self.sim_state = self._py_state(self.sim_env.reset())
+
+    def _py_state(self, sim_state: dict) -> dict:
+        return {
+            "position": float(sim_state["position"][0]),
+            "velocity": float(sim_state["velocity"][0]),
+            "done": bool(sim_state["done"][0]),
+        }
+
+    def _show_state(self):
+        self.sim_state = self._py_state(self.sim_env._observe())
 
     def render(self):
         display(self)
@@ -46,11 +57,11 @@ class MountainCarWidget(anywidget.AnyWidget):
 
     async def step(self, action: int, dt: float = 0.01) -> dict:
         sim_state = self.sim_env.step(action)
-        self.sim_state = sim_state
+        self.sim_state = self._py_state(sim_state)
         await asyncio.sleep(dt)
         return sim_state
 
     async def reset(self) -> dict:
         sim_state = self.sim_env.reset()
-        self.sim_state = sim_state
+        self.sim_state = self._py_state(sim_state)
         return sim_state
@@ -0,0 +1,167 @@
+import os
+import struct
+
+import numpy as np
+
+from . import SimEnvironment, _action_arrays
+
+
+class _Column:
+    """Growable memory-mapped .npy file, rows are appended along the first axis.
+
+    The header is padded to a fixed size so the shape can be rewritten in place
+    as the file grows, the data always starts at the same offset.
+    """
+
+    def __init__(self, path, dtype, row_shape, chunk_size):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.chunk_size = chunk_size
+        self.length = 0
+        self.capacity = 0
+        self.array = None
+        # room for the largest possible shape
+        widest = self._header((2**63 - 1,) + self.row_shape)
+        self.offset = -(-(len(widest) + 11) // 64) * 64
+        with open(path, "wb") as f:
+            f.write(b"\0" * self.offset)
+        self._write_header()
+
+    def _header(self, shape):
+        return repr(
+            {
+                "descr": np.lib.format.dtype_to_descr(self.dtype),
+                "fortran_order": False,
+                "shape": tuple(shape),
+            }
+        )
+
+    def _write_header(self):
+        header = self._header((self.length,) + self.row_shape)
+        header = header.ljust(self.offset - 11) + "\n"
+        with open(self.path, "r+b") as f:
+            f.write(np.lib.format.magic(1, 0))
+            f.write(struct.pack("<H", len(header)))
+            f.write(header.encode("latin1"))
+
+    def _grow(self):
+        self.flush()
+        self.array = None
+        self.capacity += self.chunk_size
+        row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape))
+        with open(self.path, "r+b") as f:
+            f.truncate(self.offset + self.capacity * row_bytes)
+        self.array = np.memmap(
+            self.path,
+            dtype=self.dtype,
+            mode="r+",
+            offset=self.offset,
+            shape=(self.capacity,) + self.row_shape,
+        )
+
+    def append(self, row):
+        if self.length == self.capacity:
+            self._grow()
+        self.array[self.length] = row
+        self.length += 1
+
+    def flush(self):
+        if self.array is not None:
+            self.array.flush()
+        self._write_header()
+
+    def close(self):
+        self.flush()
+        self.array = None
+        row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape))
+        with open(self.path, "r+b") as f:
+            f.truncate(self.offset + self.length * row_bytes)
+
+
+class TrajectoryRecorder(SimEnvironment):
+    """Streams the transitions of `env` into one memory-mapped .npy column per field.
+
+    Every step appends the observation arrays (rewards and dones included) and
+    the actions (`action`, or `action_<key>` for dict actions) to
+    `directory/<field>.npy`. With `record_state=True` the `get_state` snapshot
+    is stored in a `state` column. Columns grow `chunk_size` steps at a time
+    so memory use does not depend on the run length. The headers hold the
+    number of recorded steps after every `flush()`, `close()` and chunk, the
+    files can be read with `np.load(path, mmap_mode="r")` or `load_trajectory`.
+    """
+
+    def __init__(self, env, directory, chunk_size=1024, record_state=False):
+        self.env = env
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.record_state = record_state
+        self.columns = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    # the state methods of SimEnvironment would shadow __getattr__, delegate them
+    @property
+    def state_fields(self):
+        return self.env.state_fields
+
+    def _state_arrays(self):
+        return self.env._state_arrays()
+
+    def get_state(self, indices=None):
+        return self.env.get_state(indices)
+
+    def set_state(self, state, indices=None):
+        self.env.set_state(state, indices)
+
+    def __len__(self):
+        return next(iter(self.columns.values())).length if self.columns else 0
+
+    def _append(self, name, value):
+        value = np.asarray(value)
+        column = self.columns.get(name)
+        if column is None:
+            path = os.path.join(self.directory, f"{name}.npy")
+            column = _Column(path, value.dtype, value.shape, self.chunk_size)
+            self.columns[name] = column
+        column.append(value)
+
+    def step(self, action, **kwargs):
+        obs = self.env.step(action, **kwargs)
+        for key, value in _action_arrays(action, self.env.num_envs).items():
+            self._append("action" if key is None else f"action_{key}", value)
+        # record the array form, list observations are not always rectangular
+        for key, value in self.env._observe().items():
+            self._append(key, value)
+        if self.record_state:
+            self._append("state", self.env.get_state())
+        return obs
+
+    def reset(self, *args, **kwargs):
+        return self.env.reset(*args, **kwargs)
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+
+    def close(self):
+        for column in self.columns.values():
+            column.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_trajectory(directory, mmap_mode="r") -> dict:
+    """Open the columns written by a TrajectoryRecorder, memory mapped by default."""
+    columns = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".npy"):
+            path = os.path.join(directory, name)
+            columns[name[:-4]] = np.load(path, mmap_mode=mmap_mode)
+    return columns
@@ -0,0 +1,4 @@
+from .. import _lazy_getattr
+
+# frontends pull in tkinter / anywidget, they are imported on first use
+__getattr__ = _lazy_getattr(__name__, {"RobotSim": ".widget"})
@@ -49,18 +49,20 @@ empty_map = {
 }
 
 
-def gen_simple_map():
+def gen_simple_map(seed=None):
+    # a seed gives a reproducible map without touching the global random state
+    rng = random if seed is None else random.Random(seed)
     map_data = copy.deepcopy(empty_map)
     width = 800
     height = 600
 
     # Generate static obstacles
     for _ in range(6):
-        w = 60 + random.random() * 120
-        h = 40 + random.random() * 100
-        x = 120 + random.random() * (width - 240)
-        y = 120 + random.random() * (height - 240)
-        angle = random.random() * math.pi
+        w = 60 + rng.random() * 120
+        h = 40 + rng.random() * 100
+        x = 120 + rng.random() * (width - 240)
+        y = 120 + rng.random() * (height - 240)
+        angle = rng.random() * math.pi
         rect = {
             "type": "rectangle",
             "x": x,
@@ -77,9 +79,9 @@ def gen_simple_map():
 
     # Generate dynamic pushable boxes
     for _ in range(3):
-        size = 40 + random.random() * 20
-        x = 100 + random.random() * (width - 200)
-        y = 100 + random.random() * (height - 200)
+        size = 40 + rng.random() * 20
+        x = 100 + rng.random() * (width - 200)
+        y = 100 + rng.random() * (height - 200)
         box = {
             "type": "rectangle",
             "x": x,
@@ -99,10 +101,10 @@ def gen_simple_map():
         map_data["map"].append(box)
 
     for i in range(2):
-        size = 40 + random.random() * 20
-        x = 100 + random.random() * (width - 200)
-        y = 100 + random.random() * (height - 200)
-        angle = random.random() * math.pi
+        size = 40 + rng.random() * 20
+        x = 100 + rng.random() * (width - 200)
+        y = 100 + rng.random() * (height - 200)
+        angle = rng.random() * math.pi
         box = {
             "type": "rectangle",
             "x": x,
@@ -1,16 +1,16 @@
+import hashlib
 import json
 import math
+import os
 import numpy as np
 from pathlib import Path
-from .. import SimEnvironment
-
-
-try:
-    with open(Path(__file__).parent / "track_0.json", "r") as f:
-        track = json.load(f)
-except FileNotFoundError:
-    raise FileNotFoundError("Unable to load track data.")
+from .. import SimEnvironment, _lazy_getattr
 
+TRACK_PATH = Path(__file__).parent / "track_0.json"
+# bump when the cached track layout changes
+TRACK_CACHE_VERSION = 2
+# start pose (x, y, heading in degrees) of tracks without a "start" entry
+DEFAULT_START = (-85.0, -42.0, 0.0)
 
 MAX_VEL = 20.0
 ACCELERATION = 8.0
@@ -21,80 +21,762 @@ CAR_LENGTH = 1.6  # WORLD units (smaller)
 CAR_WIDTH = 0.8
 CAR_RADIUS = 0.5
 
-LOCAL_WALLS = track["walls"]
-CHECKPOINTS = np.array(track["checkpoints"], dtype=np.float32)
 CHECKPOINT_RADIUS = 3.0
 
-WORLD_WALLS = np.array(
-    [(x, y, w, h, math.radians(rot)) for x, y, w, h, rot in LOCAL_WALLS],
-    dtype=np.float32,
-)
-
-W_X, W_Y, W_W, W_H, W_ROT = WORLD_WALLS.T
-W_HW = W_W * 0.5
-W_HH = W_H * 0.5
-W_COS = np.cos(-W_ROT)
-W_SIN = np.sin(-W_ROT)
-
-# Precompute ray offsets
 RAY_SPREAD = math.radians(75)  # total fan angle
 RAY_LENGTH = 12.0  # world units
 RAY_COUNT = 5
-ray_offsets = np.linspace(
-    -RAY_SPREAD * 0.5, RAY_SPREAD * 0.5, RAY_COUNT, dtype=np.float32
-)
 EPS = 1e-6
 
 
-def cast_rays(x, y, angle):
-    # x,y,angle: (N,)
-    a = angle[:, None] + ray_offsets[None, :]  # (N,R)
-    dx = np.cos(a)
-    dy = np.sin(a)
-    best_t = np.full((x.shape[0], RAY_COUNT), RAY_LENGTH, dtype=np.float32)
-
-    # Expand dims for broadcasting
-    ox = x[:, None, None]
-    oy = y[:, None, None]
-    rdx = dx[:, :, None]
-    rdy = dy[:, :, None]
-
-    wx = W_X[None, None, :]
-    wy = W_Y[None, None, :]
-
-    # transform ray to wall space
-    rox = (ox - wx) * W_COS - (oy - wy) * W_SIN
-    roy = (ox - wx) * W_SIN + (oy - wy) * W_COS
-    rdxl = rdx * W_COS - rdy * W_SIN
-    rdyl = rdx * W_SIN + rdy * W_COS
-
-    tmin = np.full_like(rox, -1e9)
-    tmax = np.full_like(rox, 1e9)
-    mask_x = np.abs(rdxl) > EPS
-    safe_rdxl = np.where(mask_x, rdxl, 1.0)
-    tx1 = (-W_HW - rox) / safe_rdxl
-    tx2 = (W_HW - rox) / safe_rdxl
-    tmin = np.where(mask_x, np.maximum(tmin, np.minimum(tx1, tx2)), tmin)
-    tmax = np.where(mask_x, np.minimum(tmax, np.maximum(tx1, tx2)), tmax)
-    mask_y = np.abs(rdyl) > EPS
-    safe_rdyl = np.where(mask_y, rdyl, 1.0)
-    ty1 = (-W_HH - roy) / safe_rdyl
-    ty2 = (W_HH - roy) / safe_rdyl
-    tmin = np.where(mask_y, np.maximum(tmin, np.minimum(ty1, ty2)), tmin)
-    tmax = np.where(mask_y, np.minimum(tmax, np.maximum(ty1, ty2)), tmax)
-    valid = (tmax >= tmin) & (tmax > 0.0)
-    t = np.where(valid, np.where(tmin > 0, tmin, tmax), np.inf)
-    best_t = np.minimum(best_t, t.min(axis=2))
-    return best_t
-
-
-def collides(cx, cy):
-    dx = cx[:, None] - W_X[None, :]
-    dy = cy[:, None] - W_Y[None, :]
-    lx = dx * W_COS[None, :] - dy * W_SIN[None, :]
-    ly = dx * W_SIN[None, :] + dy * W_COS[None, :]
-    px = np.clip(lx, -W_HW[None, :], W_HW[None, :])
-    py = np.clip(ly, -W_HH[None, :], W_HH[None, :])
+class SensorConfig:
+    """Ray sensor layout and schedule.
+
+    `ray_count` rays are spread evenly over `spread` radians around the car
+    heading and see walls up to `length` away. The rays are cast every `period`
+    physics steps and the last scan is kept in between, with `period=0` they are
+    only cast on reset and by `TopDownDrivingEnv.scan`.
+    """
+
+    def __init__(
+        self,
+        ray_count: int = RAY_COUNT,
+        spread: float = RAY_SPREAD,
+        length: float = RAY_LENGTH,
+        period: int = 1,
+    ):
+        self.ray_count = ray_count
+        self.spread = spread
+        self.length = length
+        self.period = period
+        self.offsets = np.linspace(
+            -spread * 0.5, spread * 0.5, ray_count, dtype=np.float32
+        )
+
+
+# ray angles of the default sensor relative to the heading
+ray_offsets = SensorConfig().offsets
+
+
+# bytes of scratch memory used by the ray casting temporaries
+RAY_MEMORY_BUDGET = 64 * 2**20
+
+# world units between the samples of the signed distance fields
+SDF_CELL_SIZE = 0.25
+
+# centerline segments around the current one that cars are projected onto
+CENTERLINE_WINDOW = (-1, 2)
+
+
+class WallGrid:
+    """Uniform grid over the track, each cell lists the walls within `reach` of it.
+
+    Cells are padded to the same length with the index of an empty wall placed
+    far outside the track, so lookups return a dense (N, K) array of wall indices.
+    """
+
+    def __init__(self, origin, cell_size, nx, ny, cells):
+        self.origin = origin
+        self.cell_size = cell_size
+        self.nx = nx
+        self.ny = ny
+        self.cells = cells
+
+    @classmethod
+    def build(cls, track, reach, cell_size=4.0, margin=1.0):
+        # axis aligned half extents of the rotated walls
+        ext_x = np.abs(track.w_hw * track.w_cos) + np.abs(track.w_hh * track.w_sin)
+        ext_y = np.abs(track.w_hw * track.w_sin) + np.abs(track.w_hh * track.w_cos)
+        reach = reach + margin
+        lo_x, hi_x = track.w_x - ext_x - reach, track.w_x + ext_x + reach
+        lo_y, hi_y = track.w_y - ext_y - reach, track.w_y + ext_y + reach
+
+        origin = np.array([lo_x.min(), lo_y.min()], dtype=np.float32)
+        nx = int(np.ceil((hi_x.max() - origin[0]) / cell_size))
+        ny = int(np.ceil((hi_y.max() - origin[1]) / cell_size))
+
+        def cell_range(lo, hi, axis, n):
+            i0 = int((lo - origin[axis]) // cell_size)
+            i1 = int((hi - origin[axis]) // cell_size)
+            return max(i0, 0), min(i1, n - 1)
+
+        cells = [[] for _ in range(nx * ny)]
+        for i in range(track.empty_wall):
+            ix0, ix1 = cell_range(lo_x[i], hi_x[i], 0, nx)
+            iy0, iy1 = cell_range(lo_y[i], hi_y[i], 1, ny)
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    cells[ix * ny + iy].append(i)
+
+        k = max(len(c) for c in cells)
+        padded = np.full((len(cells), k), track.empty_wall, dtype=np.int32)
+        for cell_idx, walls in enumerate(cells):
+            padded[cell_idx, : len(walls)] = walls
+        return cls(origin, cell_size, nx, ny, padded)
+
+    def query(self, x, y, track_idx=None):
+        # x,y: (N,) -> candidate wall indices (N, K)
+        ix = ((x - self.origin[0]) // self.cell_size).astype(np.intp)
+        iy = ((y - self.origin[1]) // self.cell_size).astype(np.intp)
+        np.clip(ix, 0, self.nx - 1, out=ix)
+        np.clip(iy, 0, self.ny - 1, out=iy)
+        return self.cells[ix * self.ny + iy]
+
+
+class PooledWallGrid:
+    """The wall grids of several tracks in one cell table, looked up per car by track index."""
+
+    def __init__(self, grids, wall_offsets, local_empty, empty_wall):
+        k = max(grid.cells.shape[1] for grid in grids)
+        cells = []
+        for grid, offset, local in zip(grids, wall_offsets, local_empty):
+            pooled = np.full((len(grid.cells), k), empty_wall, dtype=np.int32)
+            width = grid.cells.shape[1]
+            pooled[:, :width] = np.where(
+                grid.cells == local, empty_wall, grid.cells + offset
+            )
+            cells.append(pooled)
+        self.cells = np.concatenate(cells)
+        sizes = [len(c) for c in cells]
+        self.cell_offset = np.cumsum([0] + sizes[:-1]).astype(np.intp)
+        self.origin = np.array([grid.origin for grid in grids], dtype=np.float32)
+        self.cell_size = np.array([grid.cell_size for grid in grids], dtype=np.float32)
+        self.nx = np.array([grid.nx for grid in grids], dtype=np.intp)
+        self.ny = np.array([grid.ny for grid in grids], dtype=np.intp)
+
+    def query(self, x, y, track_idx=None):
+        # x,y,track_idx: (N,) -> candidate wall indices (N, K)
+        if track_idx is None:
+            track_idx = 0
+        nx, ny = self.nx[track_idx], self.ny[track_idx]
+        cell_size = self.cell_size[track_idx]
+        ix = ((x - self.origin[track_idx, 0]) // cell_size).astype(np.intp)
+        iy = ((y - self.origin[track_idx, 1]) // cell_size).astype(np.intp)
+        np.clip(ix, 0, nx - 1, out=ix)
+        np.clip(iy, 0, ny - 1, out=iy)
+        return self.cells[self.cell_offset[track_idx] + ix * ny + iy]
+
+
+class DistanceField:
+    """Signed distance to the closest wall sampled on a grid, negative inside walls.
+
+    Lookups interpolate bilinearly between the four surrounding samples, points
+    outside the grid are clamped to its border. `values` holds the nx * ny
+    samples flattened x major.
+    """
+
+    def __init__(self, origin, cell_size, nx, ny, values):
+        self.origin = origin
+        self.cell_size = cell_size
+        self.nx = nx
+        self.ny = ny
+        self.values = values
+
+    @classmethod
+    def build(cls, track, cell_size=SDF_CELL_SIZE, margin=4.0, chunk=64):
+        ext_x = np.abs(track.w_hw * track.w_cos) + np.abs(track.w_hh * track.w_sin)
+        ext_y = np.abs(track.w_hw * track.w_sin) + np.abs(track.w_hh * track.w_cos)
+        lo_x = (track.w_x - ext_x).min() - margin
+        lo_y = (track.w_y - ext_y).min() - margin
+        nx = int(np.ceil(((track.w_x + ext_x).max() + margin - lo_x) / cell_size)) + 1
+        ny = int(np.ceil(((track.w_y + ext_y).max() + margin - lo_y) / cell_size)) + 1
+        origin = np.array([lo_x, lo_y], dtype=np.float32)
+
+        sx = origin[0] + np.arange(nx) * cell_size
+        sy = origin[1] + np.arange(ny)[None, :, None] * cell_size
+        values = np.empty((nx, ny), dtype=np.float32)
+        # (chunk, ny, W) distances of the samples to every wall
+        for start in range(0, nx, chunk):
+            dx = sx[start : start + chunk, None, None] - track.w_x
+            dy = sy - track.w_y
+            qx = np.abs(dx * track.w_cos - dy * track.w_sin) - track.w_hw
+            qy = np.abs(dx * track.w_sin + dy * track.w_cos) - track.w_hh
+            outside = np.hypot(np.maximum(qx, 0.0), np.maximum(qy, 0.0))
+            inside = np.minimum(np.maximum(qx, qy), 0.0)
+            values[start : start + chunk] = (outside + inside).min(axis=2)
+        return cls(origin, cell_size, nx, ny, values.reshape(-1))
+
+    def query(self, x, y, track_idx=None):
+        # x,y: (N,) -> signed wall distances (N,)
+        return _bilinear(
+            self.values, self.origin, self.cell_size, self.nx, self.ny, 0, x, y
+        )
+
+
+class PooledDistanceField:
+    """The distance fields of several tracks in one array, looked up per car by track index."""
+
+    def __init__(self, fields):
+        self.values = np.concatenate([field.values for field in fields])
+        sizes = [len(field.values) for field in fields]
+        self.value_offset = np.cumsum([0] + sizes[:-1]).astype(np.intp)
+        self.origin = np.array([field.origin for field in fields], dtype=np.float32)
+        self.cell_size = np.array(
+            [field.cell_size for field in fields], dtype=np.float32
+        )
+        self.nx = np.array([field.nx for field in fields], dtype=np.intp)
+        self.ny = np.array([field.ny for field in fields], dtype=np.intp)
+
+    def query(self, x, y, track_idx=None):
+        # x,y,track_idx: (N,) -> signed wall distances (N,)
+        if track_idx is None:
+            track_idx = 0
+        return _bilinear(
+            self.values,
+            self.origin[track_idx].T,
+            self.cell_size[track_idx],
+            self.nx[track_idx],
+            self.ny[track_idx],
+            self.value_offset[track_idx],
+            x,
+            y,
+        )
+
+
+def _bilinear(values, origin, cell_size, nx, ny, offset, x, y):
+    # float32 throughout, the clip bounds and indices would promote to float64
+    fx = np.clip((x - origin[0]) / cell_size, 0, nx - 1, dtype=np.float32)
+    fy = np.clip((y - origin[1]) / cell_size, 0, ny - 1, dtype=np.float32)
+    ix = np.minimum(fx.astype(np.intp), nx - 2)
+    iy = np.minimum(fy.astype(np.intp), ny - 2)
+    tx = fx - ix.astype(np.float32)
+    ty = fy - iy.astype(np.float32)
+    i = offset + ix * ny + iy
+    v0 = values[i] * (1 - ty) + values[i + 1] * ty
+    v1 = values[i + ny] * (1 - ty) + values[i + ny + 1] * ty
+    return v0 * (1 - tx) + v1 * tx
+
+
+# parameters (x, y, half width, half height, cos, sin) of the empty padding wall
+EMPTY_WALL_PARAMS = np.array([1e6, 1e6, 0.0, 0.0, 1.0, 0.0], dtype=np.float32)
+
+
+class Track:
+    """Walls, checkpoints and start pose of a track with the arrays used to simulate it.
+
+    `walls` rows are (x, y, width, height, rotation in degrees) and `start` is
+    (x, y, heading in degrees) as in the track JSON. `params` holds the rows
+    x, y, half width, half height, cos and sin of the walls, padded with an
+    extra empty wall (index `empty_wall`) placed far outside the track, which
+    pads the grid cells.
+    """
+
+    def __init__(self, walls, checkpoints, start=None, params=None, grids=None):
+        self.walls = np.asarray(walls, dtype=np.float64).reshape(-1, 5)
+        self.checkpoints = np.asarray(checkpoints, dtype=np.float32).reshape(-1, 2)
+        self.start = np.asarray(
+            DEFAULT_START if start is None else start, dtype=np.float64
+        )
+
+        world = self.walls.copy()
+        world[:, 4] = np.radians(world[:, 4])
+        self.world_walls = world.astype(np.float32)
+        self.w_x, self.w_y, self.w_w, self.w_h, self.w_rot = self.world_walls.T
+        self.empty_wall = len(self.world_walls)
+
+        if params is None:
+            w_cos = np.cos(-self.w_rot)
+            w_sin = np.sin(-self.w_rot)
+            params = np.column_stack(
+                [
+                    np.stack(
+                        [
+                            self.w_x,
+                            self.w_y,
+                            self.w_w * 0.5,
+                            self.w_h * 0.5,
+                            w_cos,
+                            w_sin,
+                        ]
+                    ),
+                    EMPTY_WALL_PARAMS[:, None],
+                ]
+            )
+        self.params = params
+        self.p_x, self.p_y, self.p_hw, self.p_hh, self.p_cos, self.p_sin = params
+        n = self.empty_wall
+        self.w_hw, self.w_hh = self.p_hw[:n], self.p_hh[:n]
+        self.w_cos, self.w_sin = self.p_cos[:n], self.p_sin[:n]
+
+        if grids is None:
+            grids = WallGrid.build(self, RAY_LENGTH), WallGrid.build(self, CAR_RADIUS)
+        self.ray_grid, self.collision_grid = grids
+        self._grids = {RAY_LENGTH: self.ray_grid, CAR_RADIUS: self.collision_grid}
+        # (cache directory, key) of tracks loaded from a file
+        self._cache = None
+        self._distance_field = None
+
+    def wall_grid(self, reach):
+        """WallGrid of the walls within `reach` of each cell, built once per reach."""
+        grid = self._grids.get(reach)
+        if grid is None:
+            grid = self._grids[reach] = WallGrid.build(self, reach)
+        return grid
+
+    @property
+    def centerline(self):
+        """(P, 2) open polyline from the start position through the checkpoints."""
+        return np.vstack([self.start[:2], self.checkpoints]).astype(np.float32)
+
+    @property
+    def distance_field(self):
+        """The DistanceField of the walls, built on first use and cached with the track."""
+        if self._distance_field is None:
+            field = None
+            if self._cache is not None:
+                try:
+                    field = self._load_distance_field(*self._cache)
+                except (OSError, ValueError, KeyError):
+                    pass
+            if field is None:
+                field = DistanceField.build(self)
+                if self._cache is not None:
+                    self._save_distance_field(field, *self._cache)
+            self._distance_field = field
+        return self._distance_field
+
+    @classmethod
+    def load(cls, path=TRACK_PATH, cache=True):
+        """Load a track JSON, reusing the compiled arrays cached next to it.
+
+        The cache is a `<name>.cache` directory of `.npy` files that are memory
+        mapped on load. It is keyed by the JSON contents and rebuilt when they
+        change, failures to write it (e.g. a read only install) are ignored.
+        """
+        path = Path(path)
+        source = path.read_bytes()
+        key = hashlib.sha1(source)
+        key.update(repr((TRACK_CACHE_VERSION, RAY_LENGTH, CAR_RADIUS)).encode())
+        key = key.hexdigest()
+        cache_dir = path.with_suffix(".cache")
+
+        if cache:
+            try:
+                track = cls._load_cache(cache_dir, key)
+                track._cache = cache_dir, key
+                return track
+            except (OSError, ValueError, KeyError):
+                pass
+
+        data = json.loads(source)
+        track = cls(data["walls"], data["checkpoints"], data.get("start"))
+        if cache:
+            track._save_cache(cache_dir, key)
+            track._cache = cache_dir, key
+        return track
+
+    @classmethod
+    def _load_cache(cls, cache_dir, key):
+        with open(cache_dir / "meta.json") as f:
+            meta = json.load(f)
+        if meta["key"] != key:
+            raise ValueError("stale track cache")
+
+        def array(name):
+            return np.load(cache_dir / f"{name}.npy", mmap_mode="r")
+
+        grids = [
+            WallGrid(
+                np.asarray(meta[name]["origin"], dtype=np.float32),
+                meta[name]["cell_size"],
+                meta[name]["nx"],
+                meta[name]["ny"],
+                array(f"{name}_cells"),
+            )
+            for name in ("ray", "collision")
+        ]
+        return cls(
+            array("walls"), array("checkpoints"), meta["start"], array("params"), grids
+        )
+
+    def _save_cache(self, cache_dir, key):
+        meta = {"key": key, "start": self.start.tolist()}
+        arrays = {
+            "walls": self.walls,
+            "checkpoints": self.checkpoints,
+            "params": self.params,
+        }
+        for name, grid in (("ray", self.ray_grid), ("collision", self.collision_grid)):
+            meta[name] = {
+                "origin": grid.origin.tolist(),
+                "cell_size": grid.cell_size,
+                "nx": grid.nx,
+                "ny": grid.ny,
+            }
+            arrays[f"{name}_cells"] = grid.cells
+        _write_cache(cache_dir, "meta", meta, arrays)
+
+    @staticmethod
+    def _load_distance_field(cache_dir, key):
+        with open(cache_dir / "sdf.json") as f:
+            meta = json.load(f)
+        if meta["key"] != key or meta["cell_size"] != SDF_CELL_SIZE:
+            raise ValueError("stale distance field cache")
+        return DistanceField(
+            np.asarray(meta["origin"], dtype=np.float32),
+            meta["cell_size"],
+            meta["nx"],
+            meta["ny"],
+            np.load(cache_dir / "sdf.npy", mmap_mode="r"),
+        )
+
+    @staticmethod
+    def _save_distance_field(field, cache_dir, key):
+        meta = {
+            "key": key,
+            "origin": field.origin.tolist(),
+            "cell_size": field.cell_size,
+            "nx": field.nx,
+            "ny": field.ny,
+        }
+        _write_cache(cache_dir, "sdf", meta, {"sdf": field.values})
+
+
+def _write_cache(cache_dir, meta_name, meta, arrays):
+    # the key is written last, a partially written cache never matches
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        (cache_dir / f"{meta_name}.json").unlink(missing_ok=True)
+        for name, value in arrays.items():
+            tmp = cache_dir / f"{name}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, value)
+            os.replace(tmp, cache_dir / f"{name}.npy")
+        tmp = cache_dir / f"{meta_name}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, cache_dir / f"{meta_name}.json")
+    except OSError:
+        pass
+
+
+class TrackSet:
+    """Tracks pooled into shared wall arrays, grids and checkpoint tables.
+
+    Wall indices of track i are shifted by `wall_offset[i]` and all tracks share
+    one empty wall, so cars on different tracks are simulated in one batch and
+    indexed by their track index. Checkpoints are padded to (T, C, 2) with
+    `num_checkpoints` per track.
+    """
+
+    def __init__(self, tracks):
+        self.tracks = list(tracks)
+        sizes = [track.empty_wall for track in self.tracks]
+        self.wall_offset = np.cumsum([0] + sizes[:-1])
+        self.empty_wall = sum(sizes)
+
+        params = [track.params[:, : track.empty_wall] for track in self.tracks]
+        self.params = np.concatenate(params + [EMPTY_WALL_PARAMS[:, None]], axis=1)
+        self.p_x, self.p_y, self.p_hw, self.p_hh, self.p_cos, self.p_sin = self.params
+
+        self._grids = {}
+        self.ray_grid = self.wall_grid(RAY_LENGTH)
+        self.collision_grid = self.wall_grid(CAR_RADIUS)
+
+        self.num_checkpoints = np.array([len(t.checkpoints) for t in self.tracks])
+        self.checkpoints = np.zeros(
+            (len(self.tracks), self.num_checkpoints.max(), 2), dtype=np.float32
+        )
+        for i, track in enumerate(self.tracks):
+            self.checkpoints[i, : len(track.checkpoints)] = track.checkpoints
+            self.checkpoints[i, len(track.checkpoints) :] = track.checkpoints[-1]
+
+        # start poses (x, y, heading in radians)
+        self.start = np.array([track.start for track in self.tracks])
+        self.start[:, 2] = np.radians(self.start[:, 2])
+        self.start = self.start.astype(np.float32)
+        self._distance_field = None
+
+        # centerline segments padded to (T, S) with zero length segments at the
+        # end, `seg_arc` is the arc length at the start of each segment
+        lines = [track.centerline for track in self.tracks]
+        self.num_segments = np.array([len(line) - 1 for line in lines])
+        shape = (len(lines), self.num_segments.max())
+        self.seg_start = np.zeros(shape + (2,), dtype=np.float32)
+        self.seg_dir = np.zeros(shape + (2,), dtype=np.float32)
+        self.seg_arc = np.zeros(shape, dtype=np.float32)
+        for i, line in enumerate(lines):
+            n = len(line) - 1
+            self.seg_start[i, :n] = line[:-1]
+            self.seg_start[i, n:] = line[-1]
+            self.seg_dir[i, :n] = np.diff(line, axis=0)
+        self.seg_len = np.hypot(self.seg_dir[..., 0], self.seg_dir[..., 1])
+        self.seg_arc[:, 1:] = np.cumsum(self.seg_len, axis=1)[:, :-1]
+        self.length = self.seg_len.sum(axis=1)
+        # rows x, y, dx, dy, 1 / length**2, length and arc of the segments flattened
+        # to track * S + segment, so the projection gathers with one index array
+        self._segments = np.stack(
+            [
+                self.seg_start[..., 0],
+                self.seg_start[..., 1],
+                self.seg_dir[..., 0],
+                self.seg_dir[..., 1],
+                1.0 / np.maximum(self.seg_len**2, EPS),
+                self.seg_len,
+                self.seg_arc,
+            ]
+        ).reshape(7, -1)
+
+    @property
+    def distance_field(self):
+        if self._distance_field is None:
+            self._distance_field = PooledDistanceField(
+                [track.distance_field for track in self.tracks]
+            )
+        return self._distance_field
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def wall_grid(self, reach):
+        """PooledWallGrid of the tracks' `Track.wall_grid(reach)`."""
+        grid = self._grids.get(reach)
+        if grid is None:
+            grid = self._grids[reach] = PooledWallGrid(
+                [track.wall_grid(reach) for track in self.tracks],
+                self.wall_offset,
+                [track.empty_wall for track in self.tracks],
+                self.empty_wall,
+            )
+        return grid
+
+    def project(self, x, y, track_idx, seg_idx):
+        """Arc length and segment of the closest centerline point near `seg_idx`.
+
+        Only the CENTERLINE_WINDOW segments around each car's current segment
+        are searched, so cars cannot skip ahead across walls.
+        """
+        lo, hi = CENTERLINE_WINDOW
+        last = (self.num_segments[track_idx] - 1)[:, None]
+        seg = np.clip(seg_idx[:, None] + np.arange(lo, hi + 1), 0, last)
+        flat = seg + (track_idx * self.seg_len.shape[1])[:, None]
+        ax, ay, dx, dy, inv_len2 = self._segments[:5].take(flat, axis=1)
+        # (N, W) projections clamped to the segments
+        px = x[:, None] - ax
+        py = y[:, None] - ay
+        t = (px * dx + py * dy) * inv_len2
+        np.clip(t, 0.0, 1.0, out=t)
+        px -= t * dx
+        py -= t * dy
+        dist2 = px * px + py * py
+
+        best = dist2.argmin(axis=1)[:, None]
+        t = np.take_along_axis(t, best, axis=1)[:, 0]
+        seg = np.take_along_axis(seg, best, axis=1)[:, 0]
+        best_flat = np.take_along_axis(flat, best, axis=1)[:, 0]
+        seg_len, arc = self._segments[5:].take(best_flat, axis=1)
+        return arc + t * seg_len, seg.astype(np.int32)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """A TrackSet from a TrackSet, a Track, a track JSON path or a list of those."""
+        if isinstance(spec, cls):
+            return spec
+        if spec is None:
+            return cls([default_track()])
+        if isinstance(spec, (Track, str, os.PathLike)):
+            spec = [spec]
+        return cls(t if isinstance(t, Track) else Track.load(t) for t in spec)
+
+
+_default_track = None
+
+
+def default_track():
+    """The bundled track, loaded on first use."""
+    global _default_track
+    if _default_track is None:
+        _default_track = Track.load()
+    return _default_track
+
+
+# module level names of the default track, resolved lazily by __getattr__
+_TRACK_ATTRS = {
+    "CHECKPOINTS": "checkpoints",
+    "WORLD_WALLS": "world_walls",
+    "W_X": "w_x",
+    "W_Y": "w_y",
+    "W_W": "w_w",
+    "W_H": "w_h",
+    "W_ROT": "w_rot",
+    "W_HW": "w_hw",
+    "W_HH": "w_hh",
+    "W_COS": "w_cos",
+    "W_SIN": "w_sin",
+}
+
+# frontends (tkinter / anywidget) and the rasterizer are imported on first use
+_frontend_getattr = _lazy_getattr(
+    __name__,
+    {
+        "TopDownDrivingTkFrontend": ".tk",
+        "TopDownDrivingWidget": ".widget",
+        "TopDownDrivingRasterizer": ".raster",
+    },
+)
+
+
+def __getattr__(name):
+    if name in _TRACK_ATTRS:
+        return getattr(default_track(), _TRACK_ATTRS[name])
+    if name == "LOCAL_WALLS":
+        return default_track().walls.tolist()
+    if name == "track":
+        t = default_track()
+        return {"walls": t.walls.tolist(), "checkpoints": t.checkpoints.tolist()}
+    return _frontend_getattr(name)
+
+
+class RayCaster:
+    """Casts the sensor rays in chunks of cars to bound the transient memory.
+
+    The (chunk, R, K) scratch buffers are allocated once and reused across
+    chunks and calls, so peak memory stays near `memory_budget` bytes
+    regardless of the number of cars. `track` is a Track or a TrackSet, with a
+    TrackSet each car's track is given by `track_idx`. The rays follow the
+    `sensor` SensorConfig, the default sensor when None.
+    """
+
+    def __init__(self, memory_budget=RAY_MEMORY_BUDGET, track=None, sensor=None):
+        self.memory_budget = memory_budget
+        self.track = default_track() if track is None else track
+        self.sensor = SensorConfig() if sensor is None else sensor
+        # walls within the ray length of each cell
+        self.grid = self.track.wall_grid(self.sensor.length)
+        self._scratch = None
+
+    def _buffers(self, n):
+        r = self.sensor.ray_count
+        k = self.grid.cells.shape[1]
+        # 7 float32 and 2 bool scratch arrays of shape (chunk, R, K)
+        chunk = max(1, self.memory_budget // (30 * r * k))
+        chunk = min(chunk, n)
+        if self._scratch is None or self._scratch[0].shape[0] < chunk:
+            shape = (chunk, r, k)
+            self._scratch = [np.empty(shape, dtype=np.float32) for _ in range(7)]
+            self._scratch += [np.empty(shape, dtype=bool) for _ in range(2)]
+        return chunk, self._scratch
+
+    def __call__(self, x, y, angle, out=None, track_idx=None):
+        # x,y,angle,track_idx: (N,) -> ray lengths (N,R)
+        n = x.shape[0]
+        if out is None:
+            out = np.empty((n, self.sensor.ray_count), dtype=np.float32)
+        if n == 0:
+            return out
+
+        chunk, scratch = self._buffers(n)
+        for start in range(0, n, chunk):
+            end = min(start + chunk, n)
+            bufs = [b[: end - start] for b in scratch]
+            idx = None if track_idx is None else track_idx[start:end]
+            self._cast(
+                x[start:end], y[start:end], angle[start:end], idx, out[start:end], bufs
+            )
+        return out
+
+    def _cast(self, x, y, angle, track_idx, out, bufs):
+        rdxl, rdyl, safe, t1, t2, tmin, tmax, mask, valid = bufs
+
+        a = angle[:, None] + self.sensor.offsets[None, :]  # (N,R)
+        rdx = np.cos(a)[:, :, None]
+        rdy = np.sin(a)[:, :, None]
+
+        # only test the walls that are within ray length of each car (N,1,K)
+        track = self.track
+        walls = self.grid.query(x, y, track_idx)[:, None, :]
+        wx, wy = track.p_x[walls], track.p_y[walls]
+        w_cos, w_sin = track.p_cos[walls], track.p_sin[walls]
+        w_hw, w_hh = track.p_hw[walls], track.p_hh[walls]
+
+        # transform ray to wall space
+        ox = x[:, None, None] - wx
+        oy = y[:, None, None] - wy
+        rox = ox * w_cos - oy * w_sin
+        roy = ox * w_sin + oy * w_cos
+        np.multiply(rdx, w_cos, out=rdxl)
+        np.multiply(rdy, w_sin, out=safe)
+        rdxl -= safe
+        np.multiply(rdx, w_sin, out=rdyl)
+        np.multiply(rdy, w_cos, out=safe)
+        rdyl += safe
+
+        # x slab
+        np.abs(rdxl, out=safe)
+        np.greater(safe, EPS, out=mask)
+        safe.fill(1.0)
+        np.copyto(safe, rdxl, where=mask)
+        np.divide(-w_hw - rox, safe, out=t1)
+        np.divide(w_hw - rox, safe, out=t2)
+        np.minimum(t1, t2, out=tmin)
+        np.maximum(tmin, -1e9, out=tmin)
+        np.maximum(t1, t2, out=tmax)
+        np.minimum(tmax, 1e9, out=tmax)
+        np.logical_not(mask, out=mask)
+        np.copyto(tmin, -1e9, where=mask)
+        np.copyto(tmax, 1e9, where=mask)
+
+        # y slab
+        np.abs(rdyl, out=safe)
+        np.greater(safe, EPS, out=mask)
+        safe.fill(1.0)
+        np.copyto(safe, rdyl, where=mask)
+        np.divide(-w_hh - roy, safe, out=t1)
+        np.divide(w_hh - roy, safe, out=t2)
+        np.minimum(t1, t2, out=safe)
+        np.maximum(tmin, safe, out=safe)
+        np.copyto(tmin, safe, where=mask)
+        np.maximum(t1, t2, out=safe)
+        np.minimum(tmax, safe, out=safe)
+        np.copyto(tmax, safe, where=mask)
+
+        # nearest hit, the exit distance is used when starting inside a wall
+        np.greater_equal(tmax, tmin, out=valid)
+        np.greater(tmax, 0.0, out=mask)
+        valid &= mask
+        np.greater(tmin, 0, out=mask)
+        np.copyto(tmax, tmin, where=mask)
+        np.logical_not(valid, out=valid)
+        np.copyto(tmax, np.inf, where=valid)
+
+        out.fill(self.sensor.length)
+        np.minimum(out, tmax.min(axis=2), out=out)
+
+
+def cast_rays(
+    x,
+    y,
+    angle,
+    out=None,
+    memory_budget=RAY_MEMORY_BUDGET,
+    track=None,
+    track_idx=None,
+    sensor=None,
+):
+    # x,y,angle: (N,). Slow path for one off casts: every call builds its own
+    # RayCaster and scratch buffers, so concurrent calls are safe. Keep a
+    # RayCaster around for repeated casts.
+    caster = RayCaster(memory_budget, track, sensor)
+    return caster(x, y, angle, out=out, track_idx=track_idx)
+
+
+def wall_distance(cx, cy, track=None, track_idx=None):
+    # signed distance of the points to the closest wall (N,), from the distance field
+    track = default_track() if track is None else track
+    return track.distance_field.query(cx, cy, track_idx)
+
+
+def collides(cx, cy, track=None, track_idx=None):
+    track = default_track() if track is None else track
+    # only test the walls that are within the car radius (N,K)
+    walls = track.collision_grid.query(cx, cy, track_idx)
+    dx = cx[:, None] - track.p_x[walls]
+    dy = cy[:, None] - track.p_y[walls]
+    w_cos, w_sin = track.p_cos[walls], track.p_sin[walls]
+    lx = dx * w_cos - dy * w_sin
+    ly = dx * w_sin + dy * w_cos
+    px = np.clip(lx, -track.p_hw[walls], track.p_hw[walls])
+    py = np.clip(ly, -track.p_hh[walls], track.p_hh[walls])
     ddx = lx - px
     ddy = ly - py
     hit = (ddx**2 + ddy**2) <= CAR_RADIUS**2
@@ -102,29 +784,143 @@ def collides(cx, cy):
 
 
 class TopDownDrivingEnv(SimEnvironment):
-    def __init__(self, num_envs: int = 1):
+    profiled_phases = (
+        "_step_physics",
+        "_resolve_collisions",
+        "_cast_rays",
+        "_update_progress",
+        "_reset_envs",
+    )
+    state_fields = (
+        "x",
+        "y",
+        "angle",
+        "velocity",
+        "rays",
+        "reward",
+        "done",
+        "checkpoint_idx",
+        "prev_dist",
+        "track_idx",
+        "sensor_phase",
+    )
+    # constructor arguments with one entry per env, sliced per shard by the vector envs
+    per_env_kwargs = ("track_idx",)
+
+    def __init__(
+        self,
+        num_envs: int = 1,
+        auto_reset: bool = False,
+        ray_memory_budget: int = RAY_MEMORY_BUDGET,
+        track=None,
+        track_idx=None,
+        env_offset: int = 0,
+        collision: str = "exact",
+        reward_mode: str = "checkpoint",
+        sensor: SensorConfig = None,
+    ):
         self.num_envs = num_envs
+        # auto_reset reinitializes cars that finished the track at the start of the next step
+        self.auto_reset = auto_reset
+        # tracks are a TrackSet, Track, track JSON path or a list of those, by default
+        # the global env id (env_offset + index) picks the track round robin
+        self.tracks = TrackSet.from_spec(track)
+        if track_idx is None:
+            track_idx = (env_offset + np.arange(num_envs)) % len(self.tracks)
+        self.track_idx = np.zeros(num_envs, dtype=np.int32)
+        self.track_idx[:] = track_idx
+        self.sensor = SensorConfig() if sensor is None else sensor
+        self._ray_caster = RayCaster(ray_memory_budget, self.tracks, self.sensor)
+        # "exact" tests the car circle against the nearby walls, "sdf" compares a
+        # distance field lookup to the car radius and observes it as "wall_dist"
+        if collision not in ("exact", "sdf"):
+            raise ValueError(f"collision must be 'exact' or 'sdf', got {collision!r}")
+        self.collision = collision
+        # "checkpoint" rewards getting closer to the next checkpoint plus a bonus per
+        # checkpoint, "progress" rewards the arc length gained along the centerline
+        # and observes the fraction of the track completed as "progress"
+        if reward_mode not in ("checkpoint", "progress"):
+            raise ValueError(
+                f"reward_mode must be 'checkpoint' or 'progress', got {reward_mode!r}"
+            )
+        self.reward_mode = reward_mode
+        self._distance_field = (
+            self.tracks.distance_field if collision == "sdf" else None
+        )
         self.reset()
 
-    def reset(self):
-        self.x = np.full(self.num_envs, -85.0, dtype=np.float32)
-        self.y = np.full(self.num_envs, -42.0, dtype=np.float32)
-        self.angle = np.zeros(self.num_envs, dtype=np.float32)
+    def _lookup_idx(self, mask=None):
+        # single track batches skip the per car track lookups
+        if len(self.tracks) == 1:
+            return None
+        return self.track_idx if mask is None else self.track_idx[mask]
+
+    def reset(self, mask=None):
+        if mask is not None:
+            self._reset_envs(np.asarray(mask, dtype=bool))
+            return self._observe()
+
+        start = self.tracks.start[self.track_idx]
+        self.x = start[:, 0].copy()
+        self.y = start[:, 1].copy()
+        self.angle = start[:, 2].copy()
         self.velocity = np.zeros(self.num_envs, dtype=np.float32)
-        self.rays = []
+        self.rays = np.empty((self.num_envs, self.sensor.ray_count), dtype=np.float32)
+        self._cast_rays()
+        # per env physics steps since the last scheduled scan, in [0, period)
+        self.sensor_phase = np.zeros(self.num_envs, dtype=np.int32)
+        self.reward = np.zeros(self.num_envs, dtype=np.float32)
+        self.done = np.zeros(self.num_envs, dtype=bool)
 
         self.checkpoint_idx = np.zeros(self.num_envs, dtype=np.int32)
-        cx, cy = CHECKPOINTS[0]
-        self.prev_dist = np.hypot(self.x - cx, self.y - cy)
-        return {
-            "x": self.x,
-            "y": self.y,
-            "angle": self.angle,
-            "velocity": self.velocity,
-            "rays": self.rays,
-        }
+        cp = self.tracks.checkpoints[self.track_idx, 0]
+        self.prev_dist = np.hypot(self.x - cp[:, 0], self.y - cp[:, 1])
+        if self._distance_field is not None:
+            self.wall_dist = self._distance_field.query(
+                self.x, self.y, self._lookup_idx()
+            )
+        if self.reward_mode == "progress":
+            self.arc, self.seg_idx = self.tracks.project(
+                self.x, self.y, self.track_idx, np.zeros_like(self.track_idx)
+            )
+        return self._observe()
+
+    def _reset_envs(self, mask):
+        track_idx = self.track_idx[mask]
+        start = self.tracks.start[track_idx]
+        self.x[mask] = start[:, 0]
+        self.y[mask] = start[:, 1]
+        self.angle[mask] = start[:, 2]
+        self.velocity[mask] = 0.0
+        self._cast_rays(mask)
+        self.sensor_phase[mask] = 0
+        self.reward[mask] = 0.0
+        self.done[mask] = False
+
+        self.checkpoint_idx[mask] = 0
+        cp = self.tracks.checkpoints[track_idx, 0]
+        self.prev_dist[mask] = np.hypot(
+            self.x[mask] - cp[:, 0], self.y[mask] - cp[:, 1]
+        )
+        if self._distance_field is not None:
+            self.wall_dist[mask] = self._distance_field.query(
+                self.x[mask], self.y[mask], self._lookup_idx(mask)
+            )
+        if self.reward_mode == "progress":
+            self.arc[mask], self.seg_idx[mask] = self.tracks.project(
+                self.x[mask], self.y[mask], track_idx, np.zeros_like(track_idx)
+            )
 
     def step(self, action, dt=0.02):
+        return self.step_n(action, 1, dt)
+
+    def step_n(self, action, k, dt=0.02):
+        """Repeat `action` for k substeps of dt and return the final observation.
+
+        Same as k calls to step, except that auto_reset only applies before the
+        first substep, the reward is summed over the substeps and the rays are
+        only cast for the last substep on the sensor schedule.
+        """
         throttle = action.get("throttle", 0.0)
         steer = action.get("steer", 0.0)
 
@@ -143,48 +939,140 @@ class TopDownDrivingEnv(SimEnvironment):
                 "Inputs throttle and steer must both be either scalars or numpy arrays."
             )
 
+        if self.auto_reset and self.done.any():
+            self._reset_envs(self.done.copy())
+
+        # per env last substep that falls on the sensor schedule, -1 for none
+        period = self.sensor.period
+        scan_at = np.full(self.num_envs, -1)
+        if period > 0:
+            phase = self.sensor_phase
+            scan_at = (phase + k) // period * period - phase - 1
+
+        reward = 0.0
+        for i in range(k):
+            nx, ny = self._step_physics(throttle, steer, dt)
+            self._resolve_collisions(nx, ny)
+            self._update_progress()
+            reward = reward + self.reward
+            due = scan_at == i
+            if due.all():
+                self._cast_rays()
+            elif due.any():
+                self._cast_rays(due)
+        if period > 0:
+            np.remainder(self.sensor_phase + k, period, out=self.sensor_phase)
+        self.reward = reward
+        return self._observe()
+
+    def scan(self):
+        """Cast the rays for the current positions now and return them."""
+        self._cast_rays()
+        return self.rays
+
+    def _step_physics(self, throttle, steer, dt):
+        # returns the unobstructed next positions
         self.velocity += throttle * ACCELERATION * dt
         self.velocity = np.clip(self.velocity, 0.0, MAX_VEL)
         self.angle -= steer * TURN_SPEED * dt
 
         dx = np.cos(self.angle) * self.velocity * dt
         dy = np.sin(self.angle) * self.velocity * dt
-        nx, ny = self.x + dx, self.y + dy
 
-        hit = collides(nx, ny)
+        mask = np.abs(throttle) < 1e-3
+        self.velocity = np.where(
+            mask, np.maximum(0.0, self.velocity - VEL_FRICT * dt), self.velocity
+        )
+        return self.x + dx, self.y + dy
+
+    def _resolve_collisions(self, nx, ny):
+        # cars that would hit a wall stay in place and stop
+        if self._distance_field is None:
+            hit = collides(nx, ny, self.tracks, self._lookup_idx())
+        else:
+            dist = self._distance_field.query(nx, ny, self._lookup_idx())
+            hit = dist <= CAR_RADIUS
+            self.wall_dist = np.where(hit, self.wall_dist, dist)
         self.x = np.where(hit, self.x, nx)
         self.y = np.where(hit, self.y, ny)
         self.velocity = np.where(hit, 0.0, self.velocity)
 
-        mask = np.abs(throttle) < 1e-3
-        self.velocity = np.where(
-            mask, np.maximum(0.0, self.velocity - VEL_FRICT * dt), self.velocity
+    def _cast_rays(self, mask=None):
+        if mask is None:
+            self._ray_caster(
+                self.x, self.y, self.angle, out=self.rays, track_idx=self._lookup_idx()
+            )
+            return
+        self.rays[mask] = self._ray_caster(
+            self.x[mask],
+            self.y[mask],
+            self.angle[mask],
+            track_idx=self._lookup_idx(mask),
         )
-        self.rays = cast_rays(self.x, self.y, self.angle)
 
+    def _update_progress(self):
+        if self.reward_mode == "progress":
+            self._update_arc_progress()
+            return
         # TODO: should reward be scaled by the distance between checkpoints?
         # return done if the car hits a wall?
-        cp = CHECKPOINTS[self.checkpoint_idx]
+        checkpoints = self.tracks.checkpoints
+        last_idx = self.tracks.num_checkpoints[self.track_idx] - 1
+        cp = checkpoints[self.track_idx, np.minimum(self.checkpoint_idx, last_idx)]
         dist = np.hypot(self.x - cp[:, 0], self.y - cp[:, 1])
 
         # Reward is the delta to see if the car is getting closer to the checkpoint
         reward = self.prev_dist - dist
-        reached = dist <= CHECKPOINT_RADIUS
+        reached = (dist <= CHECKPOINT_RADIUS) & ~self.done
 
         bonus = 1.0
         reward += np.where(reached, bonus, 0.0)
+        self.reward = reward
         self.checkpoint_idx = np.where(
             reached, self.checkpoint_idx + 1, self.checkpoint_idx
         )
 
-        cp = CHECKPOINTS[self.checkpoint_idx]
+        # the episode is done once the last checkpoint has been reached
+        self.done = self.checkpoint_idx > last_idx
+
+        cp = checkpoints[self.track_idx, np.minimum(self.checkpoint_idx, last_idx)]
         self.prev_dist = np.hypot(self.x - cp[:, 0], self.y - cp[:, 1])
 
-        return {
+    def _update_arc_progress(self):
+        arc, self.seg_idx = self.tracks.project(
+            self.x, self.y, self.track_idx, self.seg_idx
+        )
+        self.reward = arc - self.arc
+        self.arc = arc
+
+        # the episode is done once the car is within reach of the last checkpoint
+        length = self.tracks.length[self.track_idx]
+        self.done = arc >= length - CHECKPOINT_RADIUS
+        self.checkpoint_idx = np.where(
+            self.done, self.tracks.num_checkpoints[self.track_idx], self.seg_idx
+        ).astype(np.int32)
+
+    def _state_arrays(self):
+        arrays = super()._state_arrays()
+        if self._distance_field is not None:
+            arrays["wall_dist"] = self.wall_dist
+        if self.reward_mode == "progress":
+            arrays["arc"] = self.arc
+            arrays["seg_idx"] = self.seg_idx
+        return arrays
+
+    def _observe(self):
+        obs = {
             "x": self.x,
             "y": self.y,
             "angle": self.angle,
             "velocity": self.velocity,
             "rays": self.rays,
-            "reward": reward,
+            "reward": self.reward,
+            "done": self.done,
         }
+        if self._distance_field is not None:
+            obs["wall_dist"] = self.wall_dist
+        if self.reward_mode == "progress":
+            obs["progress"] = self.arc / self.tracks.length[self.track_idx]
+        return obs
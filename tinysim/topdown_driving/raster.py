@@ -0,0 +1,68 @@
+import numpy as np
+
+from .. import _raster
+from . import TopDownDrivingEnv, CAR_LENGTH, CAR_WIDTH
+
+
+class TopDownDrivingRasterizer(_raster.Rasterizer):
+    """Headless TopDownDrivingEnv frames, (num_envs, height, width, 3) uint8 per `render()`.
+
+    Every env sees the whole of its own track, fitted to the frame as in the tk
+    frontend, with only its own car drawn.
+    """
+
+    def __init__(self, sim_env=None, size=(84, 84)):
+        if sim_env is None:
+            sim_env = TopDownDrivingEnv()
+        super().__init__(sim_env, size)
+
+    def _background(self):
+        tracks = self.sim_env.tracks.tracks
+        img = np.empty((len(tracks), self.height, self.width, 3), dtype=np.uint8)
+        img[:] = _raster.rgb("#ffffff")
+        self.scale = np.empty(len(tracks), dtype=np.float32)
+        self.offset = np.empty((len(tracks), 2), dtype=np.float32)
+        for i, track in enumerate(tracks):
+            x, y, w, h, rot = np.asarray(track.walls, dtype=np.float32).T
+            r = np.hypot(w, h) * 0.5
+            min_x, max_x = (x - r).min(), (x + r).max()
+            min_y, max_y = (y - r).min(), (y + r).max()
+            scale = min(
+                (self.width - 2) / (max_x - min_x), (self.height - 2) / (max_y - min_y)
+            )
+            self.scale[i] = scale
+            self.offset[i] = -min_x * scale, max_y * scale
+            sx, sy = self._to_screen(x, y, i)
+            _raster.fill_rotated_rects(
+                img[i : i + 1],
+                sx[None],
+                sy[None],
+                # walls stay at least a pixel thick at low resolutions
+                np.maximum(w * 0.5 * scale, 0.6)[None],
+                np.maximum(h * 0.5 * scale, 0.6)[None],
+                -np.radians(rot)[None],
+                "#000000",
+            )
+        return img
+
+    def _to_screen(self, x, y, track_idx):
+        scale = self.scale[track_idx]
+        offset = self.offset[track_idx].T
+        return x * scale + offset[0], -y * scale + offset[1]
+
+    def _background_index(self):
+        return self.sim_env.track_idx
+
+    def _draw(self, img):
+        env = self.sim_env
+        scale = self.scale[env.track_idx]
+        cx, cy = self._to_screen(env.x, env.y, env.track_idx)
+        _raster.fill_rotated_rects(
+            img,
+            cx,
+            cy,
+            CAR_LENGTH * 0.5 * scale,
+            CAR_WIDTH * 0.5 * scale,
+            -env.angle,
+            "#ff0000",
+        )
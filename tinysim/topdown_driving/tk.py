@@ -4,15 +4,12 @@ from . import (
     TopDownDrivingEnv,
     CAR_LENGTH,
     CAR_WIDTH,
-    LOCAL_WALLS,
-    CHECKPOINTS,
-    RAY_COUNT,
-    RAY_SPREAD,
 )
 
 try:
     import tkinter as tk
     from .. import _tk_base
+    from .._replay import ReplayMixin
 except ImportError:
     raise ImportError("tkinter is required for MountainCarTkFrontend")
 
@@ -20,22 +17,6 @@ except ImportError:
 CHECKPOINT_RADIUS = 0.85
 COLOR_MAP = ["red", "orange", "yellow", "green", "blue", "indigo", "violet"]
 
-xs, ys = [], []
-
-for x, y, w, h, rot in LOCAL_WALLS:
-    r = math.hypot(w, h) * 0.5
-    xs.extend([x - r, x + r])
-    ys.extend([y - r, y + r])
-
-
-min_x, max_x = min(xs), max(xs)
-min_y, max_y = min(ys), max(ys)
-
-CANVAS_W, CANVAS_H = 800, 600
-scale = min((CANVAS_W - 2) / (max_x - min_x), (CANVAS_H - 2) / (max_y - min_y))
-offset_x = -min_x * scale
-offset_y = max_y * scale
-
 
 def rotated_rect(cx, cy, w, h, deg):
     rad = math.radians(-deg)
@@ -49,11 +30,7 @@ def rotated_rect(cx, cy, w, h, deg):
     return pts
 
 
-def world_to_screen(x, y):
-    return x * scale + offset_x, -y * scale + offset_y
-
-
-class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend):
+class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend, ReplayMixin):
 
     def __init__(self, viewport_size=(800, 600), sim_env=None):
         super().__init__()
@@ -62,18 +39,39 @@ class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend):
         self.sim_env = sim_env
         self._viewport_size = viewport_size
         self.show_rays = False
+        # the view is fitted to the track of the first car
+        self.track = sim_env.tracks.tracks[sim_env.track_idx[0]]
+        self._fit_view()
 
         self.keys = set()
 
-    async def step(self, action, dt=0.02):
-        state = self.sim_env.step(action)
+    def _fit_view(self):
+        xs, ys = [], []
+        for x, y, w, h, rot in self.track.walls:
+            r = math.hypot(w, h) * 0.5
+            xs.extend([x - r, x + r])
+            ys.extend([y - r, y + r])
 
-        if self._root:
-            self._root.after(0, lambda s=state: self._draw_state(self.sim_env))
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
+        w, h = self._viewport_size
+        self.scale = min((w - 2) / (max_x - min_x), (h - 2) / (max_y - min_y))
+        self.offset_x = -min_x * self.scale
+        self.offset_y = max_y * self.scale
+
+    def world_to_screen(self, x, y):
+        return x * self.scale + self.offset_x, -y * self.scale + self.offset_y
 
+    async def step(self, action, dt=0.02):
+        state = self.sim_env.step(action)
+        self._show_state()
         await asyncio.sleep(dt)
         return state
 
+    def _show_state(self):
+        if self._root:
+            self._root.after(0, lambda: self._draw_state(self.sim_env))
+
     async def reset(self):
         state = self.sim_env.reset()
         if self._canvas:
@@ -86,14 +84,15 @@ class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend):
         canvas = tk.Canvas(root, width=w, height=h, bg="white")
         canvas.pack(expand=True)
 
-        for x, y, w, h, rot in LOCAL_WALLS:
-            cx, cy = world_to_screen(x, y)
+        scale = self.scale
+        for x, y, w, h, rot in self.track.walls:
+            cx, cy = self.world_to_screen(x, y)
             pts = rotated_rect(cx, cy, w * scale, h * scale, rot)
             canvas.create_polygon(pts, fill="#cccccc", outline="black")
 
         r = CHECKPOINT_RADIUS * scale
-        for i, (x, y) in enumerate(CHECKPOINTS):
-            sx, sy = world_to_screen(x, y)
+        for i, (x, y) in enumerate(self.track.checkpoints):
+            sx, sy = self.world_to_screen(x, y)
 
             canvas.create_oval(
                 sx - r,
@@ -124,14 +123,21 @@ class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend):
             return
 
         c = self._canvas
-        c.delete("car")
-        c.delete("ray")
+        world_to_screen = self.world_to_screen
+        scale = self.scale
 
-        xs = sim_env.x
-        ys = sim_env.y
-        angles = sim_env.angle
+        xs = sim_env.x.tolist()
+        ys = sim_env.y.tolist()
+        angles = sim_env.angle.tolist()
         n = len(xs)
 
+        cars = self._pool(
+            "car",
+            n,
+            lambda i: c.create_polygon(
+                0, 0, 0, 0, 0, 0, fill=COLOR_MAP[i % len(COLOR_MAP)], outline="black"
+            ),
+        )
         for i in range(n):
             cx, cy = world_to_screen(xs[i], ys[i])
 
@@ -142,20 +148,19 @@ class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend):
                 CAR_WIDTH * scale,
                 math.degrees(angles[i]),
             )
-            c.create_polygon(
-                pts,
-                fill=COLOR_MAP[i % len(COLOR_MAP)],
-                outline="black",
-                tags="car",
-            )
-
+            c.coords(cars[i], *pts)
+
+        rays = sim_env.rays
+        lines = self._pool(
+            "ray",
+            rays.size if self.show_rays else 0,
+            lambda i: c.create_line(0, 0, 0, 0, fill="red", width=1),
+        )
         if not self.show_rays:
             return
 
-        ray_offsets = [
-            -RAY_SPREAD * 0.5 + RAY_SPREAD * i / (RAY_COUNT - 1)
-            for i in range(RAY_COUNT)
-        ]
+        ray_offsets = sim_env.sensor.offsets.tolist()
+        rays = rays.tolist()
 
         for i in range(n):
             ox, oy = xs[i], ys[i]
@@ -163,18 +168,9 @@ class TopDownDrivingTkFrontend(_tk_base.TkBaseFrontend):
 
             sx1, sy1 = world_to_screen(ox, oy)
 
-            for r_idx, dist in enumerate(sim_env.rays[i]):
+            for r_idx, dist in enumerate(rays[i]):
                 a = base + ray_offsets[r_idx]
                 x2 = ox + math.cos(a) * dist
                 y2 = oy + math.sin(a) * dist
                 sx2, sy2 = world_to_screen(x2, y2)
-
-                c.create_line(
-                    sx1,
-                    sy1,
-                    sx2,
-                    sy2,
-                    fill="red",
-                    width=1,
-                    tags="ray",
-                )
+                c.coords(lines[i * len(ray_offsets) + r_idx], sx1, sy1, sx2, sy2)
@@ -6,14 +6,15 @@ import numpy as np
 from IPython.display import display
 from jupyter_ui_poll import ui_events
 
-from . import TopDownDrivingEnv, LOCAL_WALLS
+from . import TopDownDrivingEnv
+from .._replay import ReplayMixin
 
 
-class TopDownDrivingWidget(anywidget.AnyWidget):
+class TopDownDrivingWidget(anywidget.AnyWidget, ReplayMixin):
     _esm = pathlib.Path(__file__).parent / "sim.js"
 
     sim_state = traitlets.Dict(default_value={}).tag(sync=True)
-    wall_positions = traitlets.List(default_value=LOCAL_WALLS).tag(sync=True)
+    wall_positions = traitlets.List(default_value=[]).tag(sync=True)
 
     _viewport_size = traitlets.Tuple(
         traitlets.Int(), traitlets.Int(), default_value=(800, 600)
@@ -27,6 +28,9 @@ class TopDownDrivingWidget(anywidget.AnyWidget):
             sim_env = TopDownDrivingEnv()
 
         self.sim_env = sim_env
+        # the walls of the first car's track are drawn
+        track = sim_env.tracks.tracks[sim_env.track_idx[0]]
+        self.wall_positions = track.walls.tolist()
         self.copy_py_state(self.sim_env.reset())
 
     def render(self):
@@ -46,6 +50,9 @@ class TopDownDrivingWidget(anywidget.AnyWidget):
             "angle": sim_state["angle"].tolist(),
         }
 
+    def _show_state(self):
+        self.copy_py_state(self.sim_env._observe())
+
     async def step(self, action: int, dt: float = 0.01) -> dict:
         sim_state = self.sim_env.step(action)
         self.copy_py_state(sim_state)
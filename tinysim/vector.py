@@ -0,0 +1,328 @@
+import inspect
+import multiprocessing as mp
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from . import SimEnvironment, _action_arrays
+
+
+def _shard_slices(num_envs, num_shards):
+    # contiguous, nearly equal slices covering range(num_envs)
+    bounds = np.linspace(0, num_envs, num_shards + 1).astype(int)
+    return [slice(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _shard_kwargs(env_cls, env_kwargs, index):
+    kwargs = dict(env_kwargs)
+    params = inspect.signature(env_cls).parameters
+    # observations are exchanged as arrays, not as python lists
+    if "array_obs" in params:
+        kwargs.setdefault("array_obs", True)
+    # seeded random streams are keyed by the global env id
+    if "env_offset" in params:
+        kwargs["env_offset"] = env_kwargs.get("env_offset", 0) + index.start
+    for name in getattr(env_cls, "per_env_kwargs", ()):
+        if kwargs.get(name) is not None and not np.isscalar(kwargs[name]):
+            kwargs[name] = np.asarray(kwargs[name])[index]
+    return kwargs
+
+
+def _obs_spec(env, obs):
+    # (shape, dtype, batched) per observation key, batched keys have num_envs rows
+    shared = getattr(env, "shared_obs_keys", ())
+    spec = {}
+    for key, value in obs.items():
+        value = np.asarray(value)
+        spec[key] = (value.shape, value.dtype.str, key not in shared)
+    return spec
+
+
+def _write_obs(out, spec, obs, index):
+    # copy a shard's observation into its rows of the batched outputs
+    for key, value in obs.items():
+        if spec[key][2]:
+            np.copyto(out[key][index], value)
+        elif index.start == 0:
+            np.copyto(out[key], value)
+
+
+def _action_slice(arrays, index):
+    if None in arrays:
+        return arrays[None][index]
+    return {key: value[index] for key, value in arrays.items()}
+
+
+class _SharedArray:
+    """Numpy array backed by a multiprocessing.shared_memory block."""
+
+    def __init__(self, shape, dtype, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def descriptor(self):
+        return self.shape, self.dtype.str, self.shm.name
+
+    @classmethod
+    def attach(cls, descriptor):
+        shape, dtype, name = descriptor
+        return cls(shape, dtype, name=name)
+
+    def close(self, unlink=False):
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(conn, env_cls, env_kwargs, index, seed_seq):
+    shared = {}
+    # forked workers can inherit the parent's global random state, reseed it
+    # from a spawned seed so unseeded shards draw different streams
+    np.random.seed(seed_seq.generate_state(4))
+    try:
+        env = env_cls(num_envs=index.stop - index.start, **env_kwargs)
+        obs = env.reset()
+        conn.send((True, _obs_spec(env, obs)))
+    except Exception:
+        conn.send((False, traceback.format_exc()))
+        return
+
+    def write(obs):
+        out = {key: array.array for key, array in shared["obs"].items()}
+        _write_obs(out, shared["spec"], obs, index)
+
+    while True:
+        cmd, data = conn.recv()
+        try:
+            if cmd == "attach":
+                shared["spec"] = data["spec"]
+                shared["obs"] = {
+                    k: _SharedArray.attach(d) for k, d in data["obs"].items()
+                }
+                shared["mask"] = _SharedArray.attach(data["mask"])
+                write(obs)
+            elif cmd == "attach_actions":
+                for array in shared.get("actions", {}).values():
+                    array.close()
+                shared["actions"] = {k: _SharedArray.attach(d) for k, d in data.items()}
+            elif cmd == "step":
+                actions = {k: a.array for k, a in shared["actions"].items()}
+                write(env.step(_action_slice(actions, index), **data))
+            elif cmd == "reset":
+                mask = shared["mask"].array[index] if data else None
+                write(env.reset(mask))
+            elif cmd == "close":
+                break
+            conn.send((True, None))
+        except Exception:
+            conn.send((False, traceback.format_exc()))
+
+    for array in [*shared.get("obs", {}).values(), *shared.get("actions", {}).values()]:
+        array.close()
+    if "mask" in shared:
+        shared["mask"].close()
+    conn.close()
+
+
+class SubprocVectorEnv(SimEnvironment):
+    """Shards `num_envs` environments of `env_cls` across worker processes.
+
+    Actions and observations are exchanged through shared memory arrays, only
+    small command messages go through the pipes. Observations are returned as
+    views of the shared arrays and are overwritten by the next step/reset.
+    """
+
+    def __init__(
+        self, env_cls, num_envs: int, num_workers=None, context=None, **env_kwargs
+    ):
+        self.num_envs = num_envs
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        self.slices = _shard_slices(num_envs, min(num_workers, num_envs))
+        ctx = mp.get_context(context)
+
+        self._conns = []
+        self._procs = []
+        self._obs = {}
+        self._actions = {}
+        self._mask = None
+
+        # workers must share the parent's tracker, otherwise forked workers start
+        # their own and unlink the shared blocks when they exit
+        resource_tracker.ensure_running()
+        seed_seqs = np.random.SeedSequence().spawn(len(self.slices))
+        for index, seed_seq in zip(self.slices, seed_seqs):
+            parent_conn, child_conn = ctx.Pipe()
+            kwargs = _shard_kwargs(env_cls, env_kwargs, index)
+            proc = ctx.Process(
+                target=_worker,
+                args=(child_conn, env_cls, kwargs, index, seed_seq),
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._procs.append(proc)
+
+        try:
+            specs = self._gather()
+            spec = specs[0]
+            for key, (shape, dtype, batched) in spec.items():
+                if batched:
+                    shape = (num_envs, *shape[1:])
+                self._obs[key] = _SharedArray(shape, dtype)
+            self._mask = _SharedArray((num_envs,), bool)
+            attach = {
+                "spec": spec,
+                "obs": {k: a.descriptor() for k, a in self._obs.items()},
+                "mask": self._mask.descriptor(),
+            }
+            self._broadcast("attach", attach)
+        except Exception:
+            self.close()
+            raise
+
+    def _broadcast(self, cmd, data=None):
+        for conn in self._conns:
+            conn.send((cmd, data))
+        return self._gather()
+
+    def _gather(self):
+        results = [conn.recv() for conn in self._conns]
+        for ok, payload in results:
+            if not ok:
+                raise RuntimeError(f"SubprocVectorEnv worker failed:\n{payload}")
+        return [payload for _, payload in results]
+
+    def _observe(self):
+        return {key: array.array for key, array in self._obs.items()}
+
+    def _write_actions(self, action):
+        arrays = _action_arrays(action, self.num_envs)
+        dtypes = {k: a.dtype for k, a in arrays.items()}
+        if dtypes != {k: a.dtype for k, a in self._actions.items()}:
+            for shared in self._actions.values():
+                shared.close(unlink=True)
+            self._actions = {
+                k: _SharedArray((self.num_envs,), dtype) for k, dtype in dtypes.items()
+            }
+            self._broadcast(
+                "attach_actions", {k: a.descriptor() for k, a in self._actions.items()}
+            )
+        for key, value in arrays.items():
+            np.copyto(self._actions[key].array, value)
+
+    def step(self, action, **kwargs) -> dict:
+        self._write_actions(action)
+        self._broadcast("step", kwargs)
+        return self._observe()
+
+    def reset(self, mask=None) -> dict:
+        if mask is not None:
+            np.copyto(self._mask.array, np.asarray(mask, dtype=bool))
+        self._broadcast("reset", mask is not None)
+        return self._observe()
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+                conn.close()
+            except (OSError, ValueError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=1.0)
+            if proc.is_alive():
+                proc.terminate()
+        for shared in [*self._obs.values(), *self._actions.values()]:
+            shared.close(unlink=True)
+        if self._mask is not None:
+            self._mask.close(unlink=True)
+        self._conns, self._procs, self._obs, self._actions = [], [], {}, {}
+        self._mask = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ThreadedVectorEnv(SimEnvironment):
+    """Steps `num_envs` environments of `env_cls` as contiguous slices on a thread pool.
+
+    Each slice is a separate `env_cls` instance in this process. The large numpy
+    kernels release the GIL, so the slices run concurrently without the startup
+    and copying cost of worker processes. Observations are written into
+    preallocated arrays and are overwritten by the next step/reset.
+    """
+
+    def __init__(self, env_cls, num_envs: int, num_threads=None, **env_kwargs):
+        self.num_envs = num_envs
+        if num_threads is None:
+            num_threads = os.cpu_count() or 1
+        self.slices = _shard_slices(num_envs, min(num_threads, num_envs))
+        self.envs = [
+            env_cls(
+                num_envs=index.stop - index.start,
+                **_shard_kwargs(env_cls, env_kwargs, index),
+            )
+            for index in self.slices
+        ]
+        self._pool = ThreadPoolExecutor(max_workers=len(self.slices))
+
+        obs = self.envs[0]._observe()
+        self._spec = _obs_spec(self.envs[0], obs)
+        self._obs = {}
+        for key, (shape, dtype, batched) in self._spec.items():
+            if batched:
+                shape = (num_envs, *shape[1:])
+            self._obs[key] = np.empty(shape, dtype=dtype)
+        self._map(lambda env, index: env._observe())
+
+    def _map(self, fn):
+        # run fn(env, index) on every slice and write the observations back
+        def run(env, index):
+            _write_obs(self._obs, self._spec, fn(env, index), index)
+
+        futures = [
+            self._pool.submit(run, env, index)
+            for env, index in zip(self.envs, self.slices)
+        ]
+        for future in futures:
+            future.result()
+        return self._obs
+
+    def _observe(self):
+        return self._obs
+
+    def step(self, action, **kwargs) -> dict:
+        arrays = _action_arrays(action, self.num_envs)
+        return self._map(
+            lambda env, index: env.step(_action_slice(arrays, index), **kwargs)
+        )
+
+    def reset(self, mask=None) -> dict:
+        if mask is None:
+            return self._map(lambda env, index: env.reset())
+        mask = np.asarray(mask, dtype=bool)
+        return self._map(lambda env, index: env.reset(mask[index]))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()